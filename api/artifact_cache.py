@@ -0,0 +1,188 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# registry versions are immutable, so only models:/<name>/<number> is safe to cache by key
+_VERSION_URI = re.compile(r"^models:/([^/@]+)/(\d+)$")
+
+_META_FILE = "meta.json"
+_STALE_TMP_SECONDS = 3600
+
+
+class ArtifactCache:
+    """Content-addressed on-disk cache of downloaded model artifacts.
+
+    Each entry lives in `<root>/<sha256(key)>/` with a `meta.json` describing
+    it. Entries are populated in a private temp dir under `root` and renamed
+    into place, so readers (other workers, other replicas sharing the volume)
+    only ever see complete entries. When the total size exceeds `max_bytes`,
+    the least recently used entries are removed.
+    """
+
+    def __init__(self, root: str, max_bytes: int = 0):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._remove_stale_tmp()
+
+    @staticmethod
+    def cacheable(model_uri: str) -> bool:
+        return _VERSION_URI.match(model_uri) is not None
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.root, hashlib.sha256(key.encode("utf-8")).hexdigest())
+
+    def get(self, key: str):
+        """Return the local artifact path for `key`, or None on a miss.
+
+        Entries whose files no longer match the sizes recorded at population
+        time (deleted or truncated on the shared volume) are dropped and
+        reported as a miss, so the next `fetch` downloads them again.
+        """
+        entry = self._entry_dir(key)
+        try:
+            with open(os.path.join(entry, _META_FILE)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        bad = _first_mismatch(entry, meta.get("files"))
+        if bad is not None:
+            logger.warning("Cached artifacts for %s are corrupt (%s); discarding", key, bad)
+            self._remove(entry)
+            return None
+        # bump mtime so eviction sees this entry as recently used
+        try:
+            os.utime(os.path.join(entry, _META_FILE))
+        except OSError:
+            pass
+        return os.path.join(entry, meta["path"])
+
+    def fetch(self, key: str, download_fn) -> str:
+        """Return the cached path for `key`, populating it with `download_fn(dst_dir)` on a miss.
+
+        `download_fn` must download into `dst_dir` and return the local path of
+        the artifact (which may be `dst_dir` itself or a path below it).
+        """
+        path = self.get(key)
+        if path is not None:
+            logger.info("Artifact cache hit for %s", key)
+            return path
+
+        logger.info("Artifact cache miss for %s; downloading", key)
+        started = time.monotonic()
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=self.root)
+        # mkdtemp is 0700; entries must be readable by other workers on a shared volume
+        os.chmod(tmp, 0o755)
+        try:
+            local_path = download_fn(os.path.join(tmp, "data"))
+            rel = os.path.relpath(local_path, tmp)
+            files = _file_sizes(tmp)
+            meta = {"key": key, "path": rel, "created": time.time(),
+                    "bytes": sum(files.values()), "files": files}
+            with open(os.path.join(tmp, _META_FILE), "w") as f:
+                json.dump(meta, f)
+            try:
+                os.rename(tmp, self._entry_dir(key))
+            except OSError:
+                # another process populated the same entry first; use theirs
+                shutil.rmtree(tmp, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        logger.info("Cached artifacts for %s in %.2fs", key, time.monotonic() - started)
+
+        self.evict(keep=key)
+        path = self.get(key)
+        if path is None:
+            raise RuntimeError(f"artifact cache entry for {key} disappeared after population")
+        return path
+
+    def entries(self):
+        """Cache entries (key, path, bytes, last_used), least recently used first."""
+        out = []
+        for name in os.listdir(self.root):
+            meta_path = os.path.join(self.root, name, _META_FILE)
+            try:
+                with open(meta_path) as f:
+                    meta = json.load(f)
+                last_used = os.path.getmtime(meta_path)
+            except (OSError, ValueError):
+                continue
+            out.append({
+                "key": meta.get("key"),
+                "dir": os.path.join(self.root, name),
+                "bytes": meta.get("bytes", 0),
+                "last_used": last_used,
+            })
+        out.sort(key=lambda e: e["last_used"])
+        return out
+
+    def evict(self, keep=None):
+        if not self.max_bytes:
+            return
+        with self._lock:
+            entries = self.entries()
+            total = sum(e["bytes"] for e in entries)
+            for e in entries:
+                if total <= self.max_bytes:
+                    break
+                if e["key"] == keep:
+                    continue
+                if not self._remove(e["dir"]):
+                    continue
+                total -= e["bytes"]
+                logger.info("Evicted cached artifacts for %s (%d bytes)", e["key"], e["bytes"])
+
+    def _remove(self, entry_dir: str) -> bool:
+        # rename first so concurrent readers never see a half-deleted entry
+        trash = tempfile.mkdtemp(prefix=".tmp-", dir=self.root)
+        try:
+            os.rename(entry_dir, os.path.join(trash, "removed"))
+        except OSError:
+            shutil.rmtree(trash, ignore_errors=True)
+            return False
+        shutil.rmtree(trash, ignore_errors=True)
+        return True
+
+    def _remove_stale_tmp(self):
+        """Remove temp dirs left behind by crashed downloads."""
+        now = time.time()
+        for name in os.listdir(self.root):
+            if not name.startswith(".tmp-"):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                if now - os.path.getmtime(path) > _STALE_TMP_SECONDS:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                pass
+
+
+def _file_sizes(path: str) -> dict:
+    """Relative path -> size of every file below `path`."""
+    sizes = {}
+    for root, _, files in os.walk(path):
+        for fn in files:
+            full = os.path.join(root, fn)
+            sizes[os.path.relpath(full, path)] = os.path.getsize(full)
+    return sizes
+
+
+def _first_mismatch(entry: str, files):
+    """First file of the manifest that is missing or has a different size, else None."""
+    for rel, size in (files or {}).items():
+        try:
+            if os.path.getsize(os.path.join(entry, rel)) != size:
+                return rel
+        except OSError:
+            return rel
+    return None
@@ -0,0 +1,148 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+# upper bounds of the batch-size histogram buckets (the last bucket is +Inf)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-item requests into one batched call.
+
+    Callers `submit()` one item and get a Future back. A background thread
+    collects items until `max_batch_size` is reached or `max_wait_ms` has passed
+    since the first item of the batch arrived, then calls `batch_fn(items)` once.
+    `batch_fn` must return one result per item, in order. If it raises, each item
+    is retried on its own so only the offending callers see the exception.
+    `on_batch(size)`, if given, is called for every batch (e.g. to feed metrics).
+    """
+
+    def __init__(self, batch_fn, max_batch_size: int = 32, max_wait_ms: float = 5.0, on_batch=None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self._batch_fn = batch_fn
+        self._on_batch = on_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = None
+        self._stopping = threading.Event()
+
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._max_queue_depth = 0
+        self._histogram = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+        logger.info("Micro-batching enabled: max_batch_size=%d max_wait_ms=%.1f",
+                    self.max_batch_size, self.max_wait * 1000)
+
+    def stop(self, timeout: float = 5.0):
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._queue.put(None)  # wake the worker
+        self._thread.join(timeout)
+        self._thread = None
+
+    def submit(self, item) -> Future:
+        fut: Future = Future()
+        self._queue.put((item, fut))
+        depth = self._queue.qsize()
+        if depth > self._max_queue_depth:
+            with self._stats_lock:
+                self._max_queue_depth = max(self._max_queue_depth, depth)
+        return fut
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            buckets = {str(b): c for b, c in zip(BATCH_SIZE_BUCKETS, self._histogram)}
+            buckets["+Inf"] = self._histogram[-1]
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue_depth,
+                "batches": self._batches,
+                "items": self._items,
+                "mean_batch_size": self._items / self._batches if self._batches else 0.0,
+                "batch_size_histogram": buckets,
+            }
+
+    def _collect(self):
+        """Block for the first item, then gather more until the batch is full or the wait expires."""
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                nxt = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if nxt is None:
+                break
+            batch.append(nxt)
+        return batch
+
+    def _record(self, size: int):
+        idx = len(BATCH_SIZE_BUCKETS)
+        for i, bound in enumerate(BATCH_SIZE_BUCKETS):
+            if size <= bound:
+                idx = i
+                break
+        with self._stats_lock:
+            self._batches += 1
+            self._items += size
+            self._histogram[idx] += 1
+        if self._on_batch is not None:
+            self._on_batch(size)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            self._record(len(batch))
+            items = [item for item, _ in batch]
+            try:
+                results = self._batch_fn(items)
+                if len(results) != len(items):
+                    raise RuntimeError(f"batch_fn returned {len(results)} results for {len(items)} items")
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                    continue
+                logger.exception("Batched call failed for %d items; retrying individually", len(batch))
+                for item, fut in batch:
+                    try:
+                        fut.set_result(self._batch_fn([item])[0])
+                    except Exception as e:
+                        fut.set_exception(e)
+                continue
+            for (_, fut), res in zip(batch, results):
+                fut.set_result(res)
+
+        # fail anything still queued so callers are not left waiting forever
+        while True:
+            try:
+                pending = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if pending is not None:
+                pending[1].set_exception(RuntimeError("micro-batcher stopped"))
@@ -0,0 +1,40 @@
+import json
+import logging
+import os
+import pickle
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+_PICKLE_FORMATS = ("pickle", "cloudpickle")
+
+
+def load_sklearn_mlmodel(local_path: str):
+    """Load an sklearn-flavor MLflow model directory without importing mlflow.
+
+    Only models saved in the pickle/cloudpickle serialization format are
+    handled (cloudpickle output is plain pickle data as long as cloudpickle is
+    importable). Returns (estimator, input_names or None), or None when the
+    directory needs the full pyfunc loader (other flavors, skops, ...).
+    """
+    with open(os.path.join(local_path, "MLmodel")) as f:
+        meta = yaml.safe_load(f) or {}
+    flavor = (meta.get("flavors") or {}).get("sklearn")
+    if not flavor:
+        return None
+    if flavor.get("serialization_format", "cloudpickle") not in _PICKLE_FORMATS:
+        return None
+    with open(os.path.join(local_path, flavor.get("pickled_model", "model.pkl")), "rb") as f:
+        estimator = pickle.load(f)
+
+    input_names = None
+    inputs = (meta.get("signature") or {}).get("inputs")
+    if inputs:
+        try:
+            cols = json.loads(inputs)
+            if cols and all("name" in c for c in cols):
+                input_names = [c["name"] for c in cols]
+        except (TypeError, ValueError):
+            logger.warning("Could not parse the input signature in %s/MLmodel", local_path)
+    return estimator, input_names
@@ -0,0 +1,83 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ModelLoader:
+    """Load models on a background thread pool with one in-flight load per URI.
+
+    `load(uri)` returns a Future resolving to whatever `load_fn(uri)` returns.
+    Concurrent calls for the same URI share the same Future, so N cold requests
+    trigger a single download. The entry is dropped once the load finishes.
+
+    A failed load (an exception or a None result) is remembered for
+    `failure_cooldown_seconds`: until then `load(uri)` returns the failed
+    Future instead of starting another download, so e.g. a canary or shadow
+    version that cannot be loaded is not retried on every request. URIs can
+    come from request paths, so expired failures are pruned and at most
+    `max_failed` are remembered (the oldest is forgotten first).
+    """
+
+    def __init__(self, load_fn, max_workers: int = 2, failure_cooldown_seconds: float = 0,
+                 max_failed: int = 256):
+        self._load_fn = load_fn
+        self.failure_cooldown_seconds = failure_cooldown_seconds
+        self.max_failed = max_failed
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="model-loader")
+        self._inflight: Dict[str, Future] = {}
+        self._failed: Dict[str, Tuple[float, Future]] = {}
+        self._lock = threading.RLock()
+
+    def load(self, uri: str) -> Future:
+        with self._lock:
+            fut = self._inflight.get(uri)
+            if fut is not None:
+                return fut
+            self._prune_failed(time.monotonic())
+            failed = self._failed.get(uri)
+            if failed is not None:
+                return failed[1]
+            logger.info("Scheduling background load for %s", uri)
+            fut = self._executor.submit(self._load_fn, uri)
+            self._inflight[uri] = fut
+        fut.add_done_callback(lambda f: self._forget(uri, f))
+        return fut
+
+    def _forget(self, uri: str, fut: Future):
+        failed = not fut.cancelled() and (fut.exception() is not None or fut.result() is None)
+        with self._lock:
+            if self._inflight.get(uri) is fut:
+                del self._inflight[uri]
+            if failed and self.failure_cooldown_seconds > 0:
+                # re-insert so the dict stays ordered by expiry
+                self._failed.pop(uri, None)
+                self._failed[uri] = (time.monotonic() + self.failure_cooldown_seconds, fut)
+                while len(self._failed) > self.max_failed:
+                    del self._failed[next(iter(self._failed))]
+        if not fut.cancelled() and fut.exception() is not None:
+            logger.error("Background load failed for %s", uri, exc_info=fut.exception())
+
+    def in_flight(self):
+        with self._lock:
+            return sorted(self._inflight)
+
+    def cooling_down(self):
+        """URIs whose last load failed less than `failure_cooldown_seconds` ago."""
+        with self._lock:
+            self._prune_failed(time.monotonic())
+            return sorted(self._failed)
+
+    def _prune_failed(self, now: float):
+        # entries are in expiry order, so stop at the first one still cooling down
+        while self._failed:
+            uri, (until, _) = next(iter(self._failed.items()))
+            if now < until:
+                break
+            del self._failed[uri]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,12 +1,38 @@
-from fastapi import FastAPI, HTTPException
-import mlflow.pyfunc
-from mlflow.tracking import MlflowClient
-import mlflow
+import time
+
+from startup_profile import StartupProfile
+
+# timing of import, registry, download, deserialize and first predict; see /admin/startup
+startup_profile = StartupProfile()
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response
+import numpy as np
 import pandas as pd
+import asyncio
+import json
 import logging
+import math
 import tempfile
+import threading
 import os
-import joblib
+
+from artifact_cache import ArtifactCache
+from batching import MicroBatcher
+import metrics
+from loader import ModelLoader
+from model_cache import ModelCache
+from registry import RegistryResolver
+from result_cache import PredictionCache
+from routing import TrafficRouter
+from schema import bind_schema
+from lean_loader import load_sklearn_mlmodel
+from tree_engine import compile_model
+from watcher import ModelWatcher
+
+startup_profile.record("import", time.perf_counter() - _import_started)
 
 app = FastAPI()
 
@@ -15,53 +41,244 @@ app = FastAPI()
 # Falls back to version 1 which we know exists in the cluster.
 MODEL_URI = os.environ.get("DEFAULT_MODEL_URI", "models:/argo-dag-demo/15")
 
-logging.basicConfig(level=logging.DEBUG)
+# Opt-in dynamic batching of concurrent single-row /predict calls.
+BATCHING_ENABLED = os.environ.get("PREDICT_BATCHING", "false").lower() in ("1", "true", "yes")
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.environ.get("BATCH_MAX_WAIT_MS", "5"))
+
+# How long a request for a not-yet-loaded version waits for the background load
+# before getting a 503 with Retry-After (0 = answer immediately).
+MODEL_LOAD_WAIT_SECONDS = float(os.environ.get("MODEL_LOAD_WAIT_SECONDS", "10"))
+MODEL_LOAD_RETRY_AFTER = int(os.environ.get("MODEL_LOAD_RETRY_AFTER", "5"))
+# After a failed load, requests for that version (including canary/shadow traffic)
+# do not trigger another load for this many seconds (0 = retry on every request).
+MODEL_LOAD_FAILURE_COOLDOWN_SECONDS = float(os.environ.get("MODEL_LOAD_FAILURE_COOLDOWN_SECONDS", "60"))
+
+# Bounds for the per-version model cache (0 disables a limit).
+MODEL_CACHE_MAX_ENTRIES = int(os.environ.get("MODEL_CACHE_MAX_ENTRIES", "4"))
+MODEL_CACHE_MAX_BYTES = int(os.environ.get("MODEL_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+MODEL_CACHE_TTL_SECONDS = float(os.environ.get("MODEL_CACHE_TTL_SECONDS", "0"))
+
+# Persistent artifact cache shared across restarts (and replicas, when on a shared volume).
+# Set ARTIFACT_CACHE_DIR to an empty string to disable it.
+ARTIFACT_CACHE_DIR = os.environ.get(
+    "ARTIFACT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "mlflow-artifact-cache"))
+ARTIFACT_CACHE_MAX_BYTES = int(os.environ.get("ARTIFACT_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+
+# Hot reload of the default model: every MODEL_WATCH_INTERVAL_SECONDS (0 disables) the
+# registry is asked which version MODEL_WATCH_URI points to (an alias such as
+# models:/argo-dag-demo@champion, a stage, or /latest); a new version is loaded and
+# warmed in the background and then swapped in without dropping requests.
+MODEL_WATCH_INTERVAL_SECONDS = float(os.environ.get("MODEL_WATCH_INTERVAL_SECONDS", "0"))
+MODEL_WATCH_URI = os.environ.get(
+    "MODEL_WATCH_URI",
+    "models:/argo-dag-demo/latest" if ArtifactCache.cacheable(MODEL_URI) else MODEL_URI)
+MODEL_WARMUP_ROWS = int(os.environ.get("MODEL_WARMUP_ROWS", "8"))
+
+# Traffic splitting on /predict: CANARY_PERCENT of requests are answered by CANARY_VERSION,
+# and every request is mirrored asynchronously to SHADOW_VERSION for offline comparison
+# (kept in a SHADOW_BUFFER_SIZE ring buffer and, optionally, appended to SHADOW_RECORD_PATH).
+CANARY_VERSION = os.environ.get("CANARY_VERSION", "")
+CANARY_PERCENT = float(os.environ.get("CANARY_PERCENT", "0"))
+SHADOW_VERSION = os.environ.get("SHADOW_VERSION", "")
+SHADOW_RECORD_PATH = os.environ.get("SHADOW_RECORD_PATH", "")
+SHADOW_BUFFER_SIZE = int(os.environ.get("SHADOW_BUFFER_SIZE", "1000"))
+SHADOW_MAX_PENDING = int(os.environ.get("SHADOW_MAX_PENDING", "100"))
+
+# LRU cache of single-row predictions keyed by (model version, feature vector); repeated
+# inputs skip model.predict entirely. 0 disables it.
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "0"))
+
+# joblib mmap_mode ("r") for raw .pkl/.joblib artifacts: NumPy arrays stay in the page
+# cache and are shared by every process that maps the same file. Empty disables it.
+# Compressed joblib files (MODEL_FORMAT=compressed in the pipeline) are always read fully.
+MODEL_MMAP_MODE = os.environ.get("MODEL_MMAP_MODE", "") or None
+
+# Lean start-up: mlflow (seconds to import) is not imported up front, and sklearn models
+# found in the local artifact cache are unpickled directly instead of through pyfunc.
+# mlflow is imported only when the cache cannot serve the model (download, other flavors).
+LEAN_STARTUP = os.environ.get("LEAN_STARTUP", "false").lower() in ("1", "true", "yes")
+
+# Serve supported sklearn tree ensembles through the compiled NumPy forest.
+FAST_TREE_ENGINE = os.environ.get("FAST_TREE_ENGINE", "true").lower() in ("1", "true", "yes")
+
+# Binary batch bodies (models with an input schema only).
+BINARY_CONTENT_TYPE = "application/octet-stream"
+ARROW_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+
+# DEBUG logging on every request is measurable under load; opt in with LOG_LEVEL=DEBUG.
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
+
+artifact_cache = None
+if ARTIFACT_CACHE_DIR:
+    try:
+        artifact_cache = ArtifactCache(ARTIFACT_CACHE_DIR, ARTIFACT_CACHE_MAX_BYTES)
+    except OSError:
+        logging.exception("Artifact cache disabled: cannot use %s", ARTIFACT_CACHE_DIR)
+
+# name/version -> artifact URI resolution is cached for REGISTRY_CACHE_TTL_SECONDS and
+# snapshotted to disk so pods can start while the tracking server is slow or down.
+REGISTRY_CACHE_TTL_SECONDS = float(os.environ.get("REGISTRY_CACHE_TTL_SECONDS", "60"))
+REGISTRY_SNAPSHOT_PATH = os.environ.get(
+    "REGISTRY_SNAPSHOT_PATH",
+    os.path.join(ARTIFACT_CACHE_DIR, "registry-snapshot.json") if artifact_cache is not None else "",
+)
+registry = RegistryResolver(ttl_seconds=REGISTRY_CACHE_TTL_SECONDS, snapshot_path=REGISTRY_SNAPSHOT_PATH or None)
+
+
+_mlflow_module = None
+
+
+def _mlflow():
+    """The mlflow module, imported on first use (timed as its own start-up phase)."""
+    global _mlflow_module
+    if _mlflow_module is None:
+        with startup_profile.phase("import_mlflow"):
+            import mlflow
+            import mlflow.artifacts
+            import mlflow.pyfunc
+        _mlflow_module = mlflow
+    return _mlflow_module
+
+
+if not LEAN_STARTUP:
+    _import_started = time.perf_counter()
+    _mlflow()
+    startup_profile.record("import_mlflow", time.perf_counter() - _import_started)
 
 
 class _RawModelWrapper:
-    def __init__(self, model):
+    def __init__(self, model, input_names=None):
         self._model = model
+        # MLmodel signature column names when loaded by the lean loader
+        self.input_names = input_names
 
     def predict(self, df):
         # assume model implements sklearn-like predict
         return self._model.predict(df)
 
 
-# モデルをロード（起動時に1回だけ）。見つからなければpickleロードのフォールバックを試みる。
+def _is_compressed_joblib(path: str) -> bool:
+    # uncompressed joblib/pickle starts with the pickle PROTO opcode 0x80, compressed with a zlib/gzip/lz4 header
+    with open(path, "rb") as f:
+        return f.read(1) != b"\x80"
+
+
+def _load_local_model(local_path: str):
+    """Load a model from a downloaded artifact directory.
+
+    Uses pyfunc when an MLmodel file is present, otherwise looks for common
+    model files (model.pkl / model.joblib).
+    """
+    # If MLmodel exists, load via pyfunc from that local path
+    mlmodel_path = os.path.join(local_path, "MLmodel")
+    if os.path.exists(mlmodel_path):
+        if LEAN_STARTUP:
+            try:
+                lean = load_sklearn_mlmodel(local_path)
+            except Exception:
+                logging.warning("Lean load of %s failed; using pyfunc", local_path, exc_info=True)
+                lean = None
+            if lean is not None:
+                return _RawModelWrapper(*lean)
+        return _mlflow().pyfunc.load_model(local_path)
+
+    # Otherwise, look for common model files (model.pkl / model.joblib)
+    for root, dirs, files in os.walk(local_path):
+        for fn in files:
+            if fn.endswith(".pkl") or fn.endswith(".joblib"):
+                full = os.path.join(root, fn)
+                try:
+                    import joblib
+
+                    raw = joblib.load(full, mmap_mode=None if _is_compressed_joblib(full) else MODEL_MMAP_MODE)
+                    return _RawModelWrapper(raw)
+                except Exception:
+                    logging.exception("Failed to joblib.load %s", full)
+    return None
+
+
+def _download_model_artifacts(model_uri: str, dst: str):
+    """Resolve models:/<name>/<version> to its artifact location and download it into `dst`."""
+    parts = model_uri[len("models:/"):].split("/")
+    if not model_uri.startswith("models:/") or len(parts) < 2:
+        raise ValueError(f"Not a models:/<name>/<version> uri: {model_uri}")
+    name, version = parts[0], parts[1]
+    with startup_profile.phase("registry"):
+        artifact_uri = registry.download_uri(name, version)
+    with startup_profile.phase("download"):
+        return _mlflow().artifacts.download_artifacts(artifact_uri=artifact_uri, dst_path=dst)
+
+
+def _probe_model_files(name: str, version: str):
+    """Return the top-level file names of a model version without downloading it."""
+    if artifact_cache is not None:
+        local_path = artifact_cache.get(f"models:/{name}/{version}")
+        if local_path is not None:
+            return os.listdir(local_path)
+    artifact_uri = registry.download_uri(name, version)
+    return [os.path.basename(f.path) for f in _mlflow().artifacts.list_artifacts(artifact_uri=artifact_uri)]
+
+
 def _load_model_with_fallback(model_uri: str):
+    """Load `model_uri`, swap in the compiled tree engine when supported and bind its input schema."""
+    started = time.perf_counter()
+    m = _load_model(model_uri)
+    # failed loads may come from arbitrary /predict/{version} paths; keep them in one series
+    version = metrics.version_label(model_uri) if m is not None else "unknown"
+    metrics.MODEL_LOAD_SECONDS.labels(version, "ok" if m is not None else "failed") \
+        .observe(time.perf_counter() - started)
+    if m is None:
+        return None
+    with startup_profile.phase("compile"):
+        if FAST_TREE_ENGINE:
+            m = compile_model(m) or m
+        return bind_schema(m)
+
+
+# モデルをロード（起動時に1回だけ）。見つからなければpickleロードのフォールバックを試みる。
+def _load_model(model_uri: str):
+    # Registry versions are immutable, so they are served from the persistent
+    # artifact cache; restarts and replicas sharing the volume skip the download.
+    # Aliases, stages and "latest" are pinned to their current version first so
+    # they share the same cache entries.
+    cache_uri = model_uri
+    if artifact_cache is not None and model_uri.startswith("models:/") and not artifact_cache.cacheable(model_uri):
+        try:
+            with startup_profile.phase("registry"):
+                cache_uri = registry.version_uri(model_uri)
+        except Exception:
+            logging.warning("Could not resolve %s to a model version", model_uri, exc_info=True)
+    cache = artifact_cache if artifact_cache is not None and artifact_cache.cacheable(cache_uri) else None
+    if cache is not None:
+        try:
+            local_path = cache.fetch(cache_uri, lambda dst: _download_model_artifacts(cache_uri, dst))
+            with startup_profile.phase("deserialize"):
+                m = _load_local_model(local_path)
+            if m is not None:
+                return m
+        except Exception:
+            logging.exception("Cached artifact load failed for %s", model_uri)
+
     try:
-        return mlflow.pyfunc.load_model(model_uri)
+        with startup_profile.phase("download+deserialize"):
+            return _mlflow().pyfunc.load_model(model_uri)
     except Exception:
         logging.exception("pyfunc.load_model failed for %s", model_uri)
 
+    if cache is not None:
+        # the fallback below would repeat the download the cache path just tried
+        return None
+
     # Fallback: try to resolve model version -> runs:/... and download artifact
     try:
         # models:/<name>/<version>
         if model_uri.startswith("models:/"):
-            parts = model_uri[len("models:/"):].split("/")
-            if len(parts) >= 2:
-                name, version = parts[0], parts[1]
-                client = MlflowClient()
-                artifact_uri = client.get_model_version_download_uri(name, version)
-                # download artifact to tmp dir
-                dst = tempfile.mkdtemp(prefix="mlflow_art_")
-                local_path = mlflow.artifacts.download_artifacts(artifact_uri=artifact_uri, dst_path=dst)
-
-                # If MLmodel exists, load via pyfunc from that local path
-                mlmodel_path = os.path.join(local_path, "MLmodel")
-                if os.path.exists(mlmodel_path):
-                    return mlflow.pyfunc.load_model(local_path)
-
-                # Otherwise, look for common model files (model.pkl / model.joblib)
-                for root, dirs, files in os.walk(local_path):
-                    for fn in files:
-                        if fn.endswith(".pkl") or fn.endswith(".joblib"):
-                            full = os.path.join(root, fn)
-                            try:
-                                raw = joblib.load(full)
-                                return _RawModelWrapper(raw)
-                            except Exception:
-                                logging.exception("Failed to joblib.load %s", full)
+            # download artifact to tmp dir
+            dst = tempfile.mkdtemp(prefix="mlflow_art_")
+            local_path = _download_model_artifacts(model_uri, dst)
+            with startup_profile.phase("deserialize"):
+                return _load_local_model(local_path)
     except Exception:
         logging.exception("Fallback loader failed for %s", model_uri)
 
@@ -69,29 +286,129 @@ def _load_model_with_fallback(model_uri: str):
 
 # Model will be loaded on startup to avoid blocking import time
 model = None
-# simple in-memory cache for loaded models keyed by models:/... uri or version
-model_cache = {}
+# models:/... uri the default model was loaded from
+model_uri_loaded = None
+# cached predictions of a version are dropped when that version leaves the model cache
+prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE) if PREDICTION_CACHE_SIZE > 0 else None
+
+
+def _invalidate_predictions(model_uri: str):
+    if prediction_cache is not None:
+        prediction_cache.invalidate(metrics.version_label(model_uri))
+
+
+# bounded LRU cache for loaded models keyed by models:/... uri; the default model is pinned
+model_cache = ModelCache(
+    max_entries=MODEL_CACHE_MAX_ENTRIES,
+    max_bytes=MODEL_CACHE_MAX_BYTES,
+    ttl_seconds=MODEL_CACHE_TTL_SECONDS,
+    on_evict=_invalidate_predictions,
+)
+# micro-batcher in front of the default model (only when PREDICT_BATCHING is set)
+batcher = None
+# background follower of MODEL_WATCH_URI (only when MODEL_WATCH_INTERVAL_SECONDS is set)
+watcher = None
+_swap_lock = threading.Lock()
+
+
+def _load_and_cache(model_uri: str):
+    """Background load task: load a model and publish it to `model_cache`.
+
+    The cache is filled before the loader's future resolves, so there is no
+    window where a finished load is neither cached nor in flight.
+    """
+    logging.info("Loading model for uri=%s", model_uri)
+    m = _load_model_with_fallback(model_uri)
+    if m is not None:
+        model_cache.put(model_uri, m)
+    return m
+
+
+loader = ModelLoader(_load_and_cache, failure_cooldown_seconds=MODEL_LOAD_FAILURE_COOLDOWN_SECONDS)
+
+
+def _warm_model(m):
+    """Run a few synthetic predictions so the first real requests don't pay lazy initialization."""
+    if m.schema is None or MODEL_WARMUP_ROWS <= 0:
+        return
+    block = np.random.default_rng(0).normal(loc=1.0, size=(MODEL_WARMUP_ROWS, len(m.schema)))
+    m.predict_array(block[:1])
+    m.predict_array(block)
+
+
+def _swap_default_model(model_uri: str, m):
+    """Make `m` the default model. Requests that already hold the old one finish on it."""
+    global model, model_uri_loaded
+    with _swap_lock:
+        old_uri = model_uri_loaded
+        if model_uri in model_cache:
+            model_cache.pin(model_uri)
+        else:
+            model_cache.put(model_uri, m, pinned=True)
+        model, model_uri_loaded = m, model_uri
+        if old_uri is not None and old_uri != model_uri:
+            # the previous default stays cached for /predict/{version} but may now be evicted
+            model_cache.pin(old_uri, False)
+            _invalidate_predictions(old_uri)
 
 
 @app.on_event("startup")
 def _startup_load_model():
-    global model
+    global model, model_uri_loaded
+    if model is not None:
+        # already loaded by api/serve.py before forking this worker; keep the shared copy
+        logging.info("Startup: using preloaded model %s", model_uri_loaded)
+        return
     logging.info("Startup: loading model %s", MODEL_URI)
-    model = _load_model_with_fallback(MODEL_URI)
-    if model is None:
-        # Try to discover available versions from MLflow and load the newest available
+    startup_profile.begin()
+    try:
+        _load_startup_model()
+    finally:
+        startup_profile.end()
+    for phase, seconds in startup_profile.phases.items():
+        metrics.STARTUP_PHASE_SECONDS.labels(phase).set(seconds)
+    logging.info("Startup timing: %s", startup_profile.summary())
+
+
+def _load_startup_model():
+    global model, model_uri_loaded
+    # pin aliases / stages to a concrete version so the loaded version is known
+    startup_uri = MODEL_URI
+    try:
+        with startup_profile.phase("registry"):
+            startup_uri = registry.version_uri(MODEL_URI)
+    except Exception:
+        logging.warning("Could not resolve %s to a model version", MODEL_URI, exc_info=True)
+    model = _load_model_with_fallback(startup_uri)
+    if model is not None:
+        model_uri_loaded = startup_uri
+    else:
+        # Try to discover available versions from MLflow and load the newest available.
+        # Versions are probed by listing their files (cheap) so that only the chosen
+        # version is downloaded: the newest one with an MLmodel, else the newest raw pickle.
         try:
-            client = MlflowClient()
-            vers = client.search_model_versions("name='argo-dag-demo'")
-            # sort by numeric version descending and try to load each
-            vers_sorted = sorted(vers, key=lambda v: int(v.version), reverse=True)
-            for v in vers_sorted:
-                candidate = f"models:/argo-dag-demo/{v.version}"
+            candidates = []
+            raw_candidate = None
+            for version in registry.versions("argo-dag-demo"):
+                try:
+                    files = _probe_model_files("argo-dag-demo", version)
+                except Exception:
+                    logging.warning("Could not list artifacts of version %s", version, exc_info=True)
+                    continue
+                if "MLmodel" in files:
+                    candidates.append(version)
+                    break
+                if raw_candidate is None and any(f.endswith((".pkl", ".joblib")) for f in files):
+                    raw_candidate = version
+            if raw_candidate is not None:
+                candidates.append(raw_candidate)
+            for version in candidates:
+                candidate = f"models:/argo-dag-demo/{version}"
                 logging.info("Attempting fallback load for %s", candidate)
                 m = _load_model_with_fallback(candidate)
                 if m is not None:
                     model = m
-                    model_cache[candidate] = m
+                    model_uri_loaded = candidate
                     logging.info("Loaded model %s", candidate)
                     break
         except Exception:
@@ -100,40 +417,452 @@ def _startup_load_model():
     if model is None:
         logging.error("Model failed to load during startup: %s", MODEL_URI)
     else:
+        # the default model must never be evicted
+        model_cache.put(model_uri_loaded, model, pinned=True)
+        try:
+            with startup_profile.phase("first_predict"):
+                _warm_model(model)
+        except Exception:
+            logging.warning("Warm-up predictions failed for %s", model_uri_loaded, exc_info=True)
         logging.info("Model loaded successfully")
 
+
+@app.on_event("startup")
+def _startup_watcher():
+    global watcher
+    if MODEL_WATCH_INTERVAL_SECONDS <= 0:
+        return
+    watcher = ModelWatcher(
+        resolve_fn=lambda: registry.version_uri(MODEL_WATCH_URI, refresh=True),
+        current_fn=lambda: model_uri_loaded,
+        load_fn=lambda uri: loader.load(uri).result(),
+        warm_fn=_warm_model,
+        swap_fn=_swap_default_model,
+        interval_seconds=MODEL_WATCH_INTERVAL_SECONDS,
+    )
+    watcher.start()
+
+
+@app.on_event("startup")
+def _startup_batcher():
+    global batcher
+    if not BATCHING_ENABLED:
+        return
+    # items carry the model they were decoded against, so a hot swap never mixes versions
+    batcher = MicroBatcher(_predict_submitted,
+                           max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS,
+                           on_batch=_on_batch)
+    batcher.start()
+
+
+def _on_batch(size: int):
+    metrics.BATCHER_BATCH_SIZE.observe(size)
+    # set on every batch rather than via set_function, which multiprocess mode cannot export
+    if batcher is not None:
+        metrics.BATCHER_QUEUE_DEPTH.set(batcher.queue_depth())
+
+
+def _shadow_predict(features: dict):
+    """Shadow call (router thread): predict with SHADOW_VERSION if loaded, else start loading it."""
+    uri = f"models:/argo-dag-demo/{SHADOW_VERSION}"
+    m = model_cache.get(uri)
+    if m is None:
+        loader.load(uri)
+        return None
+    return _predict_items(m, [_decode_single(m, features)])[0]
+
+
+router = TrafficRouter(
+    canary_version=CANARY_VERSION,
+    canary_percent=CANARY_PERCENT,
+    shadow_version=SHADOW_VERSION,
+    shadow_fn=_shadow_predict,
+    record_path=SHADOW_RECORD_PATH,
+    buffer_size=SHADOW_BUFFER_SIZE,
+    max_pending=SHADOW_MAX_PENDING,
+    on_shadow_result=lambda version, result: metrics.SHADOW_RESULTS.labels(version, result).inc(),
+)
+
+
+@app.on_event("shutdown")
+def _shutdown_batcher():
+    if watcher is not None:
+        watcher.stop()
+    router.shutdown()
+    if batcher is not None:
+        batcher.stop()
+    loader.shutdown()
+
+def _to_feature_value(value):
+    """Convert a single feature value to float, rejecting non-numeric input."""
+    if isinstance(value, bool) or value is None:
+        raise ValueError(f"invalid feature value: {value!r}")
+    v = float(value)
+    if not math.isfinite(v):
+        raise ValueError(f"feature value is not finite: {v}")
+    return v
+
+
+def _feature_mismatch(expected, keys):
+    missing = sorted(set(expected) - set(keys))
+    unexpected = sorted(set(keys) - set(expected))
+    return f"feature mismatch: missing={missing} unexpected={unexpected}"
+
+
+def _decode_features(features, columns):
+    """Decode one feature dict into a (1, n_features) block in `columns` order."""
+    if features.keys() != set(columns):
+        raise HTTPException(status_code=422, detail=_feature_mismatch(columns, features.keys()))
+    block = np.empty((1, len(columns)), dtype=np.float64)
+    try:
+        for j, c in enumerate(columns):
+            block[0, j] = _to_feature_value(features[c])
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=422, detail=f"{c}: {e}")
+    return block
+
+
+def _decode_records(records, columns=None):
+    """Validate a list of feature dicts and stack the good rows into one block.
+
+    With ``columns`` (the model's input schema) every record must have exactly
+    those keys; without it the columns are taken from the first well-formed
+    record. Rows that are not dicts, have a different key set or contain
+    non-numeric values are reported as errors instead of failing the whole batch.
+    Returns (columns, block, row_index, errors) where ``row_index`` maps each
+    block row back to its position in ``records``.
+    """
+    block = np.empty((len(records), len(columns)), dtype=np.float64) if columns is not None else None
+    n = 0
+    row_index = []
+    errors = []
+    for i, rec in enumerate(records):
+        try:
+            if not isinstance(rec, dict) or not rec:
+                raise ValueError("record must be a non-empty JSON object")
+            if columns is None:
+                values = [_to_feature_value(rec[c]) for c in rec]
+                columns = list(rec)
+                block = np.empty((len(records), len(columns)), dtype=np.float64)
+            else:
+                if rec.keys() != set(columns):
+                    raise ValueError(_feature_mismatch(columns, rec.keys()))
+                values = [_to_feature_value(rec[c]) for c in columns]
+        except (ValueError, TypeError) as e:
+            errors.append({"index": i, "detail": str(e)})
+            continue
+        block[n] = values
+        n += 1
+        row_index.append(i)
+
+    if block is None:
+        return [], np.empty((0, 0), dtype=np.float64), row_index, errors
+    return columns, block[:n], row_index, errors
+
+
+def _decode_columnar(columns_payload, columns=None):
+    """Decode a columnar payload ``{"feature": [v0, v1, ...], ...}`` into one block.
+
+    With ``columns`` the payload must contain exactly those features; the block
+    is laid out in that order. Rows containing a non-numeric value in any
+    column are reported as errors.
+    """
+    if not isinstance(columns_payload, dict) or not columns_payload:
+        raise HTTPException(status_code=422, detail="columns must be a non-empty JSON object")
+    if columns is not None and columns_payload.keys() != set(columns):
+        raise HTTPException(status_code=422, detail=_feature_mismatch(columns, columns_payload.keys()))
+    lengths = {len(v) if isinstance(v, list) else -1 for v in columns_payload.values()}
+    if len(lengths) != 1 or -1 in lengths:
+        raise HTTPException(status_code=422, detail="all columns must be lists of the same length")
+    n_rows = lengths.pop()
+
+    columns = list(columns) if columns is not None else list(columns_payload)
+    block = np.empty((n_rows, len(columns)), dtype=np.float64)
+    valid = np.ones(n_rows, dtype=bool)
+    errors = {}
+    for j, name in enumerate(columns):
+        col = columns_payload[name]
+        try:
+            block[:, j] = np.asarray(col, dtype=np.float64)
+            bad = np.flatnonzero(~np.isfinite(block[:, j]))
+            if bad.size == 0:
+                continue
+        except (ValueError, TypeError):
+            bad = range(n_rows)
+        # slow path: find the offending rows of this column only
+        for i in bad:
+            try:
+                block[i, j] = _to_feature_value(col[i])
+            except (ValueError, TypeError) as e:
+                valid[i] = False
+                errors.setdefault(int(i), f"{name}: {e}")
+
+    row_index = np.flatnonzero(valid).tolist()
+    error_list = [{"index": i, "detail": d} for i, d in sorted(errors.items())]
+    return columns, block[valid], row_index, error_list
+
+
+def _decode_batch_payload(payload, columns=None):
+    """Accept a list of records, ``{"records": [...]}`` or ``{"columns": {...}}``."""
+    if isinstance(payload, list):
+        return _decode_records(payload, columns)
+    if isinstance(payload, dict):
+        if "records" in payload and isinstance(payload["records"], list):
+            return _decode_records(payload["records"], columns)
+        if "columns" in payload:
+            return _decode_columnar(payload["columns"], columns)
+    raise HTTPException(
+        status_code=422,
+        detail="batch payload must be a list of records, {'records': [...]} or {'columns': {...}}",
+    )
+
+
+def _reject_non_finite(columns, block):
+    """Report rows with NaN or infinite values as errors, as the JSON decoders do."""
+    finite = np.isfinite(block)
+    if finite.all():
+        return columns, block, list(range(len(block))), []
+    valid = finite.all(axis=1)
+    errors = []
+    for i in np.flatnonzero(~valid):
+        j = int(np.flatnonzero(~finite[i])[0])
+        errors.append({"index": int(i), "detail": f"{columns[j]}: feature value is not finite: {block[i, j]}"})
+    return columns, block[valid], np.flatnonzero(valid).tolist(), errors
+
+
+def _decode_batch_body(m, content_type: str, dtype: str, body: bytes):
+    """Decode a batch request body into (columns, block, row_index, errors).
+
+    Besides JSON, models with an input schema accept raw little-endian rows
+    (``application/octet-stream``, dtype from the X-Feature-Dtype header) and
+    Arrow IPC streams, both decoded straight into a block in schema order.
+    """
+    schema = m.schema
+    content_type = content_type.split(";")[0].strip().lower()
+    if content_type in (BINARY_CONTENT_TYPE, ARROW_CONTENT_TYPE):
+        if schema is None:
+            raise HTTPException(status_code=415, detail="binary bodies need a model with an input schema")
+        try:
+            if content_type == BINARY_CONTENT_TYPE:
+                block = schema.decode_binary(body, dtype)
+            else:
+                block = schema.decode_arrow(body)
+        except RuntimeError as e:
+            raise HTTPException(status_code=415, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return _reject_non_finite(schema.columns, block)
+
+    try:
+        payload = json.loads(body)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"invalid JSON body: {e}")
+    return _decode_batch_payload(payload, schema.columns if schema is not None else None)
+
+
+def _predict_batch(m, columns, block, row_index, errors):
+    """Run one vectorized ``model.predict`` over every valid row of a decoded batch."""
+    n_rows = len(row_index) + len(errors)
+    predictions = [None] * n_rows
+
+    if row_index:
+        try:
+            preds = m.predict_array(block, columns)
+            for i, p in zip(row_index, preds):
+                predictions[i] = int(p)
+        except Exception:
+            # The block failed as a whole (e.g. schema enforcement); isolate bad rows
+            # by falling back to per-row prediction so good rows still get answers.
+            logging.exception("Batch predict failed; retrying row by row")
+            for pos, i in enumerate(row_index):
+                try:
+                    predictions[i] = int(m.predict_array(block[pos:pos + 1], columns)[0])
+                except Exception as e:
+                    errors.append({"index": i, "detail": str(e)})
+            errors.sort(key=lambda e: e["index"])
+
+    return {"predictions": predictions, "errors": errors}
+
+
+def _decode_and_predict_batch(m, version: str, content_type: str, dtype: str, body: bytes):
+    """Decode a batch body and predict it; runs in the threadpool so neither step blocks the event loop."""
+    with metrics.stage("decode", version):
+        decoded = _decode_batch_body(m, content_type, dtype, body)
+    with metrics.stage("predict", version):
+        return _predict_batch(m, *decoded)
+
+
+async def _handle_batch(m, version: str, request: Request):
+    with metrics.in_flight(version):
+        body = await request.body()
+        result = await run_in_threadpool(
+            _decode_and_predict_batch, m, version, request.headers.get("content-type", "application/json"),
+            request.headers.get("x-feature-dtype", "float64"), body)
+        with metrics.stage("encode", version):
+            return JSONResponse(result)
+
+
+async def _handle_single(m, version: str, features: dict, mirror: bool = False):
+    with metrics.in_flight(version):
+        started = time.perf_counter()
+        with metrics.stage("decode", version):
+            item = _decode_single(m, features)
+        cache = prediction_cache
+        cache_key = PredictionCache.key(version, item) if cache is not None else None
+        pred = None
+        if cache is not None and cache_key is not None:
+            pred = cache.get(cache_key)
+            metrics.PREDICTION_CACHE_LOOKUPS.labels("hit" if pred is not None else "miss").inc()
+        if pred is None:
+            with metrics.stage("predict", version):
+                if batcher is not None and m is model:
+                    pred = await asyncio.wrap_future(batcher.submit((m, item)))
+                else:
+                    pred = (await run_in_threadpool(_predict_items, m, [item]))[0]
+            if cache is not None and cache_key is not None:
+                cache.put(cache_key, pred)
+        router.record_latency(version, time.perf_counter() - started)
+        if mirror:
+            router.mirror(features, version, pred)
+        with metrics.stage("encode", version):
+            return JSONResponse({"prediction": pred}, headers={"X-Model-Version": version})
+
+
+@app.middleware("http")
+async def _record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # label by route template (/predict/{version}) to keep cardinality bounded
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        metrics.REQUESTS.labels(request.method, path, str(status)).inc()
+        metrics.REQUEST_LATENCY.labels(request.method, path).observe(time.perf_counter() - started)
+
+
 # 推論エンドポイント
+@app.post("/predict/batch")
+async def predict_batch(request: Request):
+    """Predict many rows with the startup-loaded default model in a single call.
+
+    Rows that fail validation get ``null`` in ``predictions`` and an entry in ``errors``.
+    """
+    m, uri = model, model_uri_loaded
+    if m is None:
+        raise HTTPException(status_code=503, detail="Model not available")
+    return await _handle_batch(m, metrics.version_label(uri), request)
+
+
+def _predict_records(m, records):
+    """Predict a list of single-row feature dicts with one `model.predict` call."""
+    df = pd.DataFrame(records)
+    return [int(p) for p in m.predict(df)]
+
+
+def _decode_single(m, features: dict):
+    """Decode a /predict body against the model schema; models without one get the raw dict."""
+    if m.schema is None:
+        return features
+    return _decode_features(features, m.schema.columns)
+
+
+def _predict_items(m, items):
+    """Predict items from `_decode_single` (schema blocks or raw dicts) with one call."""
+    if all(isinstance(item, np.ndarray) for item in items):
+        return [int(p) for p in m.predict_array(np.vstack(items))]
+    return _predict_records(m, items)
+
+
+def _predict_submitted(pairs):
+    """Micro-batcher callback: predict (model, item) pairs with one call per distinct model."""
+    results = [None] * len(pairs)
+    groups = {}
+    for i, (m, _) in enumerate(pairs):
+        groups.setdefault(id(m), (m, []))[1].append(i)
+    for m, idx in groups.values():
+        for i, p in zip(idx, _predict_items(m, [pairs[i][1] for i in idx])):
+            results[i] = p
+    return results
+
+
 @app.post("/predict")
-def predict(features: dict):
-    """Predict using the startup-loaded default model."""
-    if model is None:
+async def predict(features: dict):
+    """Predict using the startup-loaded default model.
+
+    With PREDICT_BATCHING enabled, concurrent calls are coalesced into one
+    `model.predict` by the micro-batcher. With CANARY_VERSION / SHADOW_VERSION
+    set, a share of calls is answered by the canary and every call is mirrored
+    to the shadow in the background (see /routing/stats). The answering version
+    is returned in the X-Model-Version header.
+    """
+    m, uri = model, model_uri_loaded
+    if m is None:
         raise HTTPException(status_code=503, detail="Model not available")
-    df = pd.DataFrame([features])
-    pred = model.predict(df)[0]
-    return {"prediction": int(pred)}
+    version = metrics.version_label(uri)
+    canary_version = router.canary_version
+    if canary_version is not None and router.use_canary():
+        canary_uri = f"models:/argo-dag-demo/{canary_version}"
+        canary = model_cache.get(canary_uri)
+        if canary is not None:
+            m, version = canary, canary_version
+        else:
+            # never make callers wait for the canary; the default model answers meanwhile
+            loader.load(canary_uri)
+    return await _handle_single(m, version, features, mirror=True)
 
 
-@app.post("/predict/{version}")
-def predict_version(version: str, features: dict):
-    """Predict using a specific model version.
+async def _get_version_model(version: str):
+    """Return the cached model for `version`, loading it in the background on first use.
 
-    Example: POST /predict/1 with JSON body of features.
-    The endpoint will try to load `models:/argo-dag-demo/{version}` and cache it.
+    Concurrent requests for a cold version share one load. If it does not finish
+    within MODEL_LOAD_WAIT_SECONDS the caller gets a 503 with Retry-After while
+    the load keeps running.
     """
     model_uri = f"models:/argo-dag-demo/{version}"
 
     # try cache first
     m = model_cache.get(model_uri)
+    metrics.MODEL_CACHE_LOOKUPS.labels("hit" if m is not None else "miss").inc()
+    if m is not None:
+        return m
+
+    fut = loader.load(model_uri)
+    try:
+        # shield: a timed-out waiter must not cancel the shared load
+        m = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(fut)), timeout=MODEL_LOAD_WAIT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Model version {version} is loading",
+            headers={"Retry-After": str(MODEL_LOAD_RETRY_AFTER)},
+        )
+    except Exception:
+        m = None
     if m is None:
-        logging.info("Loading model for uri=%s", model_uri)
-        m = _load_model_with_fallback(model_uri)
-        if m is None:
-            raise HTTPException(status_code=503, detail=f"Model version {version} not available")
-        model_cache[model_uri] = m
+        raise HTTPException(status_code=503, detail=f"Model version {version} not available")
+    return m
+
 
-    df = pd.DataFrame([features])
-    pred = model_cache[model_uri].predict(df)[0]
-    return {"prediction": int(pred)}
+@app.post("/predict/{version}/batch")
+async def predict_version_batch(version: str, request: Request):
+    """Batch variant of `/predict/{version}`; see `/predict/batch` for the payload formats."""
+    m = await _get_version_model(version)
+    return await _handle_batch(m, version, request)
+
+
+@app.post("/predict/{version}")
+async def predict_version(version: str, features: dict):
+    """Predict using a specific model version.
+
+    Example: POST /predict/1 with JSON body of features.
+    The endpoint will try to load `models:/argo-dag-demo/{version}` and cache it.
+    """
+    m = await _get_version_model(version)
+    return await _handle_single(m, version, features)
 
 
 @app.get("/")
@@ -143,4 +872,69 @@ def read_root():
 
 @app.get("/health")
 def health():
-    return {"status": "ok", "model_loaded": model is not None}
+    return {
+        "status": "ok",
+        "model_loaded": model is not None,
+        "model_uri": model_uri_loaded,
+        "model_version": metrics.version_label(model_uri_loaded) if model_uri_loaded else None,
+        "loading": loader.in_flight(),
+        "load_failed": loader.cooling_down(),
+        "reload": watcher.stats() if watcher is not None else None,
+    }
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/admin/models")
+def admin_models():
+    """List cached model versions with estimated size, hit counts and last-use time."""
+    return {
+        "default_model": model_uri_loaded,
+        "max_entries": model_cache.max_entries,
+        "max_bytes": model_cache.max_bytes,
+        "ttl_seconds": model_cache.ttl_seconds,
+        "total_bytes": model_cache.total_bytes(),
+        "hits": model_cache.hits,
+        "misses": model_cache.misses,
+        "evictions": model_cache.evictions,
+        "entries": model_cache.entries(),
+    }
+
+
+@app.get("/admin/startup")
+def admin_startup():
+    """Seconds spent per start-up phase (import, registry, download, deserialize, ...)."""
+    return {"lean_startup": LEAN_STARTUP, "mlflow_imported": _mlflow_module is not None,
+            **startup_profile.report()}
+
+
+@app.get("/routing/stats")
+def routing_stats():
+    """Canary/shadow configuration, shadow agreement counts and per-version latency."""
+    return router.stats()
+
+
+@app.get("/routing/shadow")
+def routing_shadow(limit: int = 100):
+    """Most recent shadow comparisons (newest last)."""
+    return {"records": router.recent(limit)}
+
+
+@app.get("/admin/prediction-cache")
+def admin_prediction_cache():
+    """Size and hit rate of the prediction result cache."""
+    if prediction_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **prediction_cache.stats()}
+
+
+@app.get("/batching/stats")
+def batching_stats():
+    """Queue depth and batch-size histogram of the micro-batcher."""
+    if batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **batcher.stats()}
@@ -0,0 +1,81 @@
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+from batching import BATCH_SIZE_BUCKETS
+
+# latency buckets from 0.5ms (compiled single-row predict) up to 10s
+_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUESTS = Counter(
+    "fastapi_requests_total", "HTTP requests handled", ["method", "path", "status"])
+REQUEST_LATENCY = Histogram(
+    "fastapi_request_duration_seconds", "End-to-end request latency", ["method", "path"],
+    buckets=_LATENCY_BUCKETS)
+STAGE_LATENCY = Histogram(
+    "fastapi_predict_stage_duration_seconds", "Latency of each prediction stage (decode, predict, encode)",
+    ["stage", "model_version"], buckets=_LATENCY_BUCKETS)
+# gauges are summed over live worker processes when serving with api/serve.py --workers N
+IN_FLIGHT = Gauge(
+    "fastapi_predict_in_flight", "Prediction requests currently being served", ["model_version"],
+    multiprocess_mode="livesum")
+MODEL_CACHE_LOOKUPS = Counter(
+    "fastapi_model_cache_lookups_total", "model_cache lookups by result", ["result"])
+PREDICTION_CACHE_LOOKUPS = Counter(
+    "fastapi_prediction_cache_lookups_total", "Prediction result cache lookups by result", ["result"])
+MODEL_LOAD_SECONDS = Histogram(
+    "fastapi_model_load_duration_seconds", "Time to load a model version", ["model_version", "result"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0))
+SHADOW_RESULTS = Counter(
+    "fastapi_shadow_predictions_total", "Shadow predictions by outcome (agree, disagree, error, skipped, dropped)",
+    ["shadow_version", "result"])
+STARTUP_PHASE_SECONDS = Gauge(
+    "fastapi_startup_phase_seconds", "Seconds spent in each start-up phase of this process", ["phase"],
+    multiprocess_mode="max")
+BATCHER_QUEUE_DEPTH = Gauge(
+    "fastapi_batcher_queue_depth", "Requests waiting in the micro-batcher queue",
+    multiprocess_mode="livesum")
+BATCHER_BATCH_SIZE = Histogram(
+    "fastapi_batcher_batch_size", "Rows per coalesced model.predict call", buckets=BATCH_SIZE_BUCKETS)
+
+
+def version_label(model_uri) -> str:
+    """`models:/argo-dag-demo/15` -> `15` (low-cardinality label value)."""
+    if not model_uri:
+        return "none"
+    return model_uri.rstrip("/").rsplit("/", 1)[-1]
+
+
+@contextmanager
+def stage(name: str, model_version: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.labels(name, model_version).observe(time.perf_counter() - started)
+
+
+@contextmanager
+def in_flight(model_version: str):
+    gauge = IN_FLIGHT.labels(model_version)
+    gauge.inc()
+    try:
+        yield
+    finally:
+        gauge.dec()
+
+
+def render():
+    """Body and content type for the /metrics endpoint.
+
+    Under PROMETHEUS_MULTIPROC_DIR (set by api/serve.py for multiple workers)
+    every scrape aggregates the files of all workers, so any worker can answer.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
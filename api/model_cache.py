@@ -0,0 +1,158 @@
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_model_bytes(model) -> int:
+    """Estimate the resident size of a model from the size of its pickle.
+
+    Returns 0 when the model cannot be pickled (it then only counts towards
+    the entry limit, not the byte budget).
+    """
+    try:
+        return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        logger.warning("Could not pickle %s to estimate its size", type(model).__name__)
+        return 0
+
+
+class _Entry:
+    __slots__ = ("model", "size_bytes", "pinned", "hits", "loaded_at", "last_used")
+
+    def __init__(self, model, size_bytes: int, pinned: bool):
+        now = time.time()
+        self.model = model
+        self.size_bytes = size_bytes
+        self.pinned = pinned
+        self.hits = 0
+        self.loaded_at = now
+        self.last_used = now
+
+
+class ModelCache:
+    """LRU cache of loaded models bounded by entry count and estimated bytes.
+
+    - `max_entries` / `max_bytes`: least recently used unpinned entries are
+      evicted until both limits hold (0 disables a limit).
+    - `ttl_seconds`: unpinned entries unused for longer than this are dropped
+      (0 disables).
+    - Pinned entries (the default model) are never evicted.
+    - `on_evict(key)`, if given, is called whenever an entry is evicted or popped.
+    """
+
+    def __init__(self, max_entries: int = 4, max_bytes: int = 0, ttl_seconds: float = 0,
+                 size_fn=estimate_model_bytes, on_evict=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._size_fn = size_fn
+        self._on_evict = on_evict
+        self._entries: OrderedDict[Any, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, time.time()):
+                self._evict(key, "ttl")
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            entry.hits += 1
+            entry.last_used = time.time()
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.model
+
+    def put(self, key, model, pinned: bool = False):
+        # sizing pickles the model, so do it outside the lock
+        size = self._size_fn(model)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            entry = _Entry(model, size, pinned or (old is not None and old.pinned))
+            self._entries[key] = entry
+            self._shrink(keep=key)
+        logger.info("Cached model %s (%d bytes, pinned=%s)", key, size, entry.pinned)
+
+    def pin(self, key, pinned: bool = True):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.pinned = pinned
+            if not pinned:
+                self._shrink()
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        if self._on_evict is not None:
+            self._on_evict(key)
+        return entry.model
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(e.size_bytes for e in self._entries.values())
+
+    def entries(self):
+        """Snapshot of the cache contents, most recently used last."""
+        with self._lock:
+            return [
+                {
+                    "key": key,
+                    "size_bytes": e.size_bytes,
+                    "pinned": e.pinned,
+                    "hits": e.hits,
+                    "loaded_at": e.loaded_at,
+                    "last_used": e.last_used,
+                }
+                for key, e in self._entries.items()
+            ]
+
+    def _expired(self, entry, now: float) -> bool:
+        return bool(self.ttl_seconds) and not entry.pinned and now - entry.last_used > self.ttl_seconds
+
+    def _evict(self, key, reason: str):
+        entry = self._entries.pop(key)
+        self.evictions += 1
+        logger.info("Evicted model %s from cache (%s, %d bytes)", key, reason, entry.size_bytes)
+        if self._on_evict is not None:
+            self._on_evict(key)
+
+    def _shrink(self, keep=None):
+        """Drop expired entries, then LRU unpinned entries until the limits hold. Caller holds the lock."""
+        now = time.time()
+        for key in [k for k, e in self._entries.items() if k != keep and self._expired(e, now)]:
+            self._evict(key, "ttl")
+
+        def over_limit():
+            if self.max_entries and len(self._entries) > self.max_entries:
+                return True
+            return bool(self.max_bytes) and sum(e.size_bytes for e in self._entries.values()) > self.max_bytes
+
+        for key in list(self._entries):
+            if not over_limit():
+                break
+            if key == keep or self._entries[key].pinned:
+                continue
+            self._evict(key, "lru")
+        if over_limit():
+            logger.warning("Model cache is over its limits with only pinned/new entries left")
@@ -0,0 +1,147 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RegistryResolver:
+    """Cached name/version -> artifact URI resolution against the MLflow registry.
+
+    Lookups are cached for `ttl_seconds`. Every successful lookup is also written
+    to an optional JSON snapshot at `snapshot_path`; when the tracking server is
+    slow or unreachable, the snapshot is used instead (even if stale) so the
+    API can still start from the artifact store or the local artifact cache.
+    """
+
+    def __init__(self, ttl_seconds: float = 60, snapshot_path=None, client_factory=None):
+        self.ttl_seconds = ttl_seconds
+        self.snapshot_path = snapshot_path
+        self._client_factory = client_factory
+        self._client = None
+        self._lock = threading.Lock()
+        # key -> (value, fetched_at)
+        self._download_uris: Dict[Any, Tuple[Any, float]] = {}
+        self._versions: Dict[Any, Tuple[Any, float]] = {}
+        self._refs: Dict[Any, Tuple[Any, float]] = {}
+        self._load_snapshot()
+
+    def _get_client(self):
+        if self._client is None:
+            if self._client_factory is None:
+                # imported on first use: answers served from the cache or snapshot never need mlflow
+                from mlflow.tracking import MlflowClient
+
+                self._client_factory = MlflowClient
+            self._client = self._client_factory()
+        return self._client
+
+    def download_uri(self, name: str, version: str) -> str:
+        key = f"{name}/{version}"
+        return self._resolve(
+            self._download_uris, key,
+            lambda: self._get_client().get_model_version_download_uri(name, version),
+        )
+
+    def versions(self, name: str):
+        """Registered version numbers of `name` as strings, newest first."""
+        return self._resolve(self._versions, name, lambda: self._fetch_versions(name))
+
+    def _fetch_versions(self, name: str):
+        vers = self._get_client().search_model_versions(f"name='{name}'")
+        return [str(v) for v in sorted((int(v.version) for v in vers), reverse=True)]
+
+    def version_uri(self, model_uri: str, refresh: bool = False) -> str:
+        """Pin a moving registry uri to a version: models:/name@alias, models:/name/latest
+        or models:/name/<Stage> -> models:/name/<version>. Other uris are returned as-is.
+
+        Alias and stage assignments can change, so they are only cached for `ttl_seconds`;
+        `refresh=True` always asks the server (still falling back to the cached value).
+        """
+        if not model_uri.startswith("models:/"):
+            return model_uri
+        ref = model_uri[len("models:/"):].rstrip("/")
+        if "@" in ref:
+            name, alias = ref.split("@", 1)
+            fetch = lambda: str(self._get_client().get_model_version_by_alias(name, alias).version)  # noqa: E731
+        else:
+            name, _, stage = ref.partition("/")
+            if not stage or stage.isdigit():
+                return model_uri
+            if stage.lower() == "latest":
+                fetch = lambda: self._fetch_versions(name)[0]  # noqa: E731
+            else:
+                fetch = lambda: str(max(  # noqa: E731
+                    int(v.version) for v in self._get_client().get_latest_versions(name, stages=[stage])))
+        return f"models:/{name}/{self._resolve(self._refs, ref, fetch, refresh)}"
+
+    def invalidate(self, name=None):
+        with self._lock:
+            if name is None:
+                self._download_uris.clear()
+                self._versions.clear()
+                self._refs.clear()
+            else:
+                self._versions.pop(name, None)
+                for key in [k for k in self._refs if k.split("@", 1)[0].split("/", 1)[0] == name]:
+                    del self._refs[key]
+                for key in [k for k in self._download_uris if k.startswith(f"{name}/")]:
+                    del self._download_uris[key]
+
+    def _resolve(self, table, key, fetch, refresh: bool = False):
+        now = time.time()
+        with self._lock:
+            hit = table.get(key)
+        if hit is not None and not refresh and now - hit[1] <= self.ttl_seconds:
+            return hit[0]
+        try:
+            value = fetch()
+        except Exception:
+            if hit is not None:
+                logger.warning("Registry lookup for %s failed; using cached value from %.0fs ago",
+                               key, now - hit[1], exc_info=True)
+                return hit[0]
+            raise
+        with self._lock:
+            table[key] = (value, now)
+        self._save_snapshot()
+        return value
+
+    def _load_snapshot(self):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path) as f:
+                snap = json.load(f)
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable registry snapshot %s", self.snapshot_path, exc_info=True)
+            return
+        # snapshot entries are treated as expired: the server is still asked first
+        for key, value in snap.get("download_uris", {}).items():
+            self._download_uris[key] = (value, 0.0)
+        for key, value in snap.get("versions", {}).items():
+            self._versions[key] = (value, 0.0)
+        for key, value in snap.get("refs", {}).items():
+            self._refs[key] = (value, 0.0)
+        logger.info("Loaded registry snapshot %s (%d download uris)", self.snapshot_path, len(self._download_uris))
+
+    def _save_snapshot(self):
+        if not self.snapshot_path:
+            return
+        with self._lock:
+            snap = {
+                "saved_at": time.time(),
+                "download_uris": {k: v for k, (v, _) in self._download_uris.items()},
+                "versions": {k: v for k, (v, _) in self._versions.items()},
+                "refs": {k: v for k, (v, _) in self._refs.items()},
+            }
+        tmp = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(snap, f)
+            os.replace(tmp, self.snapshot_path)
+        except OSError:
+            logger.warning("Could not write registry snapshot %s", self.snapshot_path, exc_info=True)
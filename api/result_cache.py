@@ -0,0 +1,76 @@
+import threading
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+
+
+class PredictionCache:
+    """LRU cache of single-row predictions keyed by (model version, feature tuple).
+
+    Keys are built from the decoded feature block (schema column order,
+    float64), so the same vector sent with keys in a different order or as
+    ints vs floats maps to one entry. Entries of a version are dropped with
+    `invalidate(version)` when that model is swapped out or evicted.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Any, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(version: str, item):
+        """Cache key for a `_decode_single` result, or None if it cannot be cached."""
+        if isinstance(item, np.ndarray):
+            return version, tuple(item.ravel().tolist())
+        try:
+            features = tuple(sorted(item.items()))
+            hash(features)
+        except TypeError:
+            return None
+        return version, features
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, version: str) -> int:
+        with self._lock:
+            stale = [k for k in self._entries if k[0] == version]
+            for k in stale:
+                del self._entries[k]
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "max_entries": self.max_entries,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
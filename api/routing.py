@@ -0,0 +1,174 @@
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyStats:
+    """Request count and latency percentiles over the last `window` observations."""
+
+    def __init__(self, window: int = 1024):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            samples = sorted(self._samples)
+            count = self.count
+        if not samples:
+            return {"count": count}
+
+        def pct(q):
+            return samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+
+        return {
+            "count": count,
+            "window": len(samples),
+            "mean_ms": sum(samples) / len(samples) * 1000,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+        }
+
+
+class TrafficRouter:
+    """Canary split and shadow mirroring for the default-model /predict path.
+
+    - `canary_percent` of requests are answered by `canary_version` instead of
+      the default model.
+    - When `shadow_version` is set, every answered request is also replayed
+      against it on a background thread via `shadow_fn(features)`. The caller
+      never waits for it. At most `max_pending` shadow calls are queued; beyond
+      that they are dropped and counted. Each comparison is kept in a bounded
+      in-memory buffer and, with `record_path`, appended to a JSONL file for
+      offline agreement analysis.
+    - Latency of every served version (and of shadow calls) is tracked.
+    """
+
+    def __init__(self, canary_version=None, canary_percent: float = 0.0, shadow_version=None,
+                 shadow_fn=None, record_path=None, buffer_size: int = 1000, max_pending: int = 100,
+                 on_shadow_result=None):
+        self.canary_version: Optional[str] = canary_version or None
+        self.canary_percent = canary_percent if self.canary_version else 0.0
+        self.shadow_version: Optional[str] = shadow_version or None
+        self._shadow_fn = shadow_fn
+        self._on_shadow_result = on_shadow_result
+        self.record_path: Optional[str] = record_path or None
+        self.max_pending = max_pending
+        self._records: Deque[dict] = deque(maxlen=buffer_size)
+        self._latency: Dict[Tuple[str, str], LatencyStats] = {}
+        self._lock = threading.Lock()
+        self._pending = threading.BoundedSemaphore(max(1, max_pending))
+        self._executor = None
+        if self.shadow_version:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+        self.shadow_counts = {"agree": 0, "disagree": 0, "error": 0, "skipped": 0, "dropped": 0}
+
+    def use_canary(self) -> bool:
+        return self.canary_percent > 0 and random.random() * 100 < self.canary_percent
+
+    def record_latency(self, version: str, seconds: float, kind: str = "served"):
+        key = (kind, version)
+        with self._lock:
+            stats = self._latency.get(key)
+            if stats is None:
+                stats = self._latency[key] = LatencyStats()
+        stats.observe(seconds)
+
+    def mirror(self, features: dict, primary_version: str, primary_prediction):
+        """Queue a shadow prediction for a request already answered by `primary_version`."""
+        if self._executor is None or primary_version == self.shadow_version:
+            return
+        if not self._pending.acquire(blocking=False):
+            self._count("dropped")
+            return
+        try:
+            self._executor.submit(self._run_shadow, features, primary_version, primary_prediction)
+        except RuntimeError:
+            # executor shut down
+            self._pending.release()
+
+    def _run_shadow(self, features, primary_version, primary_prediction):
+        try:
+            started = time.perf_counter()
+            try:
+                pred = self._shadow_fn(features)
+                error = None
+            except Exception as e:
+                pred, error = None, str(e)
+            elapsed = time.perf_counter() - started
+
+            if error is None and pred is None:
+                # shadow model not loaded yet; nothing to compare
+                self._count("skipped")
+                return
+            result = "error" if error is not None else ("agree" if pred == primary_prediction else "disagree")
+            self._count(result)
+            if error is None:
+                self.record_latency(self.shadow_version, elapsed, kind="shadow")
+            record = {
+                "ts": time.time(),
+                "features": features,
+                "primary_version": primary_version,
+                "primary": primary_prediction,
+                "shadow_version": self.shadow_version,
+                "shadow": pred,
+                "shadow_ms": elapsed * 1000,
+                "result": result,
+            }
+            if error is not None:
+                record["error"] = error
+            self._records.append(record)
+            if self.record_path:
+                self._write(self.record_path, record)
+        finally:
+            self._pending.release()
+
+    def _count(self, result: str):
+        with self._lock:
+            self.shadow_counts[result] += 1
+        if self._on_shadow_result is not None:
+            self._on_shadow_result(self.shadow_version, result)
+
+    def _write(self, path: str, record: dict):
+        try:
+            with self._lock, open(path, "a") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+        except OSError:
+            logger.warning("Could not append shadow record to %s", path, exc_info=True)
+
+    def recent(self, limit: int = 100):
+        records = list(self._records)
+        return records[-limit:] if limit > 0 else records
+
+    def stats(self) -> dict:
+        with self._lock:
+            latency = dict(self._latency)
+            counts = dict(self.shadow_counts)
+        compared = counts["agree"] + counts["disagree"]
+        return {
+            "canary_version": self.canary_version,
+            "canary_percent": self.canary_percent,
+            "shadow_version": self.shadow_version,
+            "shadow": dict(counts, agreement=counts["agree"] / compared if compared else None),
+            "latency": {
+                kind: {v: s.snapshot() for (k, v), s in sorted(latency.items()) if k == kind}
+                for kind in ("served", "shadow")
+            },
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,119 @@
+import logging
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from tree_engine import FastTreePredictor, unwrap_sklearn
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow request bodies are optional
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+BINARY_DTYPES: Dict[str, np.dtype] = {"float32": np.dtype("<f4"), "float64": np.dtype("<f8")}
+
+
+class FeatureSchema:
+    """Ordered input columns of a model, read once at load time.
+
+    Taken from the MLmodel signature when there is one (read by pyfunc, or by
+    the lean loader as `input_names`), otherwise from the `feature_names_in_`
+    of the underlying sklearn estimator.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.index = {c: i for i, c in enumerate(self.columns)}
+
+    def __len__(self):
+        return len(self.columns)
+
+    @classmethod
+    def from_model(cls, model):
+        names = getattr(model, "input_names", None)
+        if names:
+            return cls(names)
+        metadata = getattr(model, "metadata", None)
+        if metadata is not None:
+            try:
+                input_schema = metadata.get_input_schema()
+                if input_schema is not None and input_schema.has_input_names():
+                    return cls(input_schema.input_names())
+            except Exception:
+                logger.warning("Could not read the input signature from MLmodel", exc_info=True)
+        names = getattr(unwrap_sklearn(model), "feature_names_in_", None)
+        if names is not None:
+            return cls(names)
+        return None
+
+    def frame(self, block):
+        return pd.DataFrame(block.astype(np.float64, copy=False), columns=self.columns, copy=False)
+
+    def decode_binary(self, body: bytes, dtype: str = "float64"):
+        """View a body of raw little-endian rows as a (rows, features) array without copying."""
+        if dtype not in BINARY_DTYPES:
+            raise ValueError(f"unsupported dtype {dtype!r}; expected one of {sorted(BINARY_DTYPES)}")
+        dt = BINARY_DTYPES[dtype]
+        row_bytes = dt.itemsize * len(self.columns)
+        if len(body) % row_bytes:
+            raise ValueError(f"body length {len(body)} is not a multiple of the row size {row_bytes}")
+        return np.frombuffer(body, dtype=dt).reshape(-1, len(self.columns))
+
+    def decode_arrow(self, body: bytes):
+        """Decode an Arrow IPC stream into a float64 block in signature column order."""
+        if pa is None:
+            raise RuntimeError("pyarrow is not installed")
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+        missing = [c for c in self.columns if c not in table.column_names]
+        unexpected = [c for c in table.column_names if c not in self.index]
+        if missing or unexpected:
+            raise ValueError(f"feature mismatch: missing={sorted(missing)} unexpected={sorted(unexpected)}")
+        block = np.empty((table.num_rows, len(self.columns)), dtype=np.float64)
+        for j, name in enumerate(self.columns):
+            block[:, j] = table.column(name).to_numpy(zero_copy_only=False)
+        return block
+
+
+class SchemaBoundModel:
+    """A loaded model together with its FeatureSchema.
+
+    `predict()` keeps the plain DataFrame interface; `predict_array()` takes a
+    block already in schema column order and skips DataFrame construction
+    entirely when the model is served by the compiled tree engine.
+    """
+
+    def __init__(self, model, schema):
+        self.model = model
+        self.schema = schema
+        self._fast_order = None
+        if isinstance(model, FastTreePredictor) and schema is not None:
+            names = model.forest.feature_names
+            if names is None and model.forest.n_features == len(schema):
+                self._fast_order = list(range(len(schema)))
+            elif names is not None and set(names) == set(schema.columns):
+                self._fast_order = [schema.index[c] for c in names]
+
+    def predict(self, df):
+        return self.model.predict(df)
+
+    def predict_array(self, block, columns=None):
+        """Predict a (rows, features) block whose columns are `columns` (default: the schema)."""
+        if columns is None or (self.schema is not None and columns == self.schema.columns):
+            if self._fast_order is not None and len(block) <= self.model.max_rows:
+                fast = np.asarray(block, dtype=np.float32)
+                if self._fast_order != list(range(len(self.schema))):
+                    fast = fast[:, self._fast_order]
+                if not np.isnan(fast).any():
+                    return self.model.forest.predict(fast)
+            return self.model.predict(self.schema.frame(block))
+        return self.model.predict(pd.DataFrame(block, columns=columns, copy=False))
+
+
+def bind_schema(model):
+    schema = FeatureSchema.from_model(model.fallback if isinstance(model, FastTreePredictor) else model)
+    if schema is None:
+        logger.warning("No input schema found for %s; requests are not validated", type(model).__name__)
+    return SchemaBoundModel(model, schema)
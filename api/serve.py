@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""Pre-fork server: load the default model once, then fork uvicorn workers that share it.
+
+Usage:
+  python serve.py --workers 4 [--host 0.0.0.0] [--port 8000] [--no-preload]
+
+`uvicorn main:app --workers N` imports and loads the model in every worker,
+so memory grows linearly with N. Here the parent process runs the normal
+startup load (registry, download, compile, warm-up), moves everything it
+allocated into the GC's permanent generation with gc.freeze() so collections
+in the workers do not write to those pages, and only then forks. The workers
+share the model pages copy-on-write and accept on one listening socket.
+
+With MODEL_MMAP_MODE=r, raw joblib artifacts are memory-mapped as well, so
+their arrays are shared through the page cache even by processes that were
+not forked from the same parent.
+
+Prometheus metrics are aggregated across workers through
+PROMETHEUS_MULTIPROC_DIR (a temp dir is used when it is not set).
+
+A model hot-swapped later by the watcher (MODEL_WATCH_INTERVAL_SECONDS) is
+loaded by each worker on its own and is not shared.
+
+A worker that exits is restarted right away. If it exits again within
+SERVE_RESPAWN_MIN_UPTIME_SECONDS of starting, its next restart waits
+SERVE_RESPAWN_BACKOFF_SECONDS, doubling per consecutive early exit up to
+SERVE_RESPAWN_MAX_BACKOFF_SECONDS, so a crash loop does not fork continuously.
+"""
+import argparse
+import gc
+import glob
+import logging
+import os
+import signal
+import socket
+import tempfile
+import time
+
+logger = logging.getLogger("serve")
+
+RESPAWN_MIN_UPTIME_SECONDS = float(os.environ.get("SERVE_RESPAWN_MIN_UPTIME_SECONDS", "30"))
+RESPAWN_BACKOFF_SECONDS = float(os.environ.get("SERVE_RESPAWN_BACKOFF_SECONDS", "1"))
+RESPAWN_MAX_BACKOFF_SECONDS = float(os.environ.get("SERVE_RESPAWN_MAX_BACKOFF_SECONDS", "60"))
+
+
+def _respawn_delay(early_exits: int) -> float:
+    """Delay before restarting a worker after `early_exits` consecutive exits shortly after start."""
+    if early_exits <= 1:
+        return 0.0
+    return min(RESPAWN_BACKOFF_SECONDS * 2 ** (early_exits - 2), RESPAWN_MAX_BACKOFF_SECONDS)
+
+
+def _prepare_multiprocess_metrics():
+    # must happen before prometheus_client is imported (via main -> metrics)
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not path:
+        path = tempfile.mkdtemp(prefix="prometheus-multiproc-")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+    for stale in glob.glob(os.path.join(path, "*.db")):
+        os.remove(stale)
+    return path
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock: socket.socket, log_level: str):
+    import uvicorn
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    config = uvicorn.Config(app, log_level=log_level.lower())
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("SERVE_WORKERS", "2")))
+    parser.add_argument("--no-preload", dest="preload", action="store_false",
+                        help="let every worker load its own model (the uvicorn --workers behaviour)")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        _prepare_multiprocess_metrics()
+
+    import main as api
+    from prometheus_client import multiprocess
+
+    log_level = os.environ.get("LOG_LEVEL", "INFO")
+    if args.preload:
+        api._startup_load_model()
+        # everything allocated so far (the model included) is never collected or moved;
+        # freezing keeps the workers' GC from dirtying those shared pages
+        gc.collect()
+        gc.freeze()
+        logger.info("Preloaded %s; forking %d workers", api.model_uri_loaded, args.workers)
+
+    sock = _bind(args.host, args.port)
+    children = {}
+    started = {}  # slot -> monotonic start time of its current worker
+    early_exits = {}  # slot -> consecutive exits within RESPAWN_MIN_UPTIME_SECONDS
+    respawn_at = {}  # slot -> monotonic time of a delayed restart
+    stopping = False
+
+    def spawn(slot: int):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(api.app, sock, log_level)
+            except BaseException:
+                logger.exception("Worker %d crashed", slot)
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = slot
+        started[slot] = time.monotonic()
+        logger.info("Started worker %d (pid %d)", slot, pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for slot in range(args.workers):
+        spawn(slot)
+
+    while children or (respawn_at and not stopping):
+        if respawn_at and not stopping:
+            now = time.monotonic()
+            for slot in [s for s, due in respawn_at.items() if due <= now]:
+                del respawn_at[slot]
+                spawn(slot)
+        try:
+            if respawn_at and not stopping:
+                # a delayed restart is pending: poll instead of blocking in wait()
+                pid, status = os.waitpid(-1, os.WNOHANG) if children else (0, 0)
+                if pid == 0:
+                    time.sleep(min(0.5, max(0.0, min(respawn_at.values()) - time.monotonic())))
+                    continue
+            else:
+                pid, status = os.wait()
+        except ChildProcessError:
+            break
+        slot = children.pop(pid, None)
+        if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+            multiprocess.mark_process_dead(pid)
+        if slot is None or stopping:
+            continue
+        uptime = time.monotonic() - started[slot]
+        early_exits[slot] = early_exits.get(slot, 0) + 1 if uptime < RESPAWN_MIN_UPTIME_SECONDS else 0
+        delay = _respawn_delay(early_exits[slot])
+        logger.warning("Worker %d (pid %d) exited with status %d after %.1fs; restarting in %.1fs",
+                       slot, pid, status, uptime, delay)
+        respawn_at[slot] = time.monotonic() + delay
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
+    serve()
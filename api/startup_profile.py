@@ -0,0 +1,64 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupProfile:
+    """Wall-clock breakdown of API start-up into named phases.
+
+    Phases are only recorded between `begin()` and `end()` and only on the
+    thread that called `begin()`, so later background loads do not skew the
+    report. Nested phases are exclusive: time spent in an inner phase (e.g.
+    `import_mlflow` inside `deserialize`) is not counted again for the outer one.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.started = None
+        self.finished = None
+        self._thread = None
+        self._stack = []
+        # phases recorded before begin() (module import) count towards the total
+        self._before_begin = 0.0
+
+    def record(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def begin(self):
+        self._thread = threading.get_ident()
+        self._before_begin = sum(self.phases.values())
+        self.started = time.perf_counter()
+
+    def end(self):
+        self.finished = time.perf_counter()
+        self._thread = None
+
+    @contextmanager
+    def phase(self, name: str):
+        if self._thread != threading.get_ident():
+            yield
+            return
+        frame = [time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = time.perf_counter() - frame[0]
+            self.record(name, elapsed - frame[1])
+            if self._stack:
+                self._stack[-1][1] += elapsed
+
+    def report(self) -> dict:
+        startup = (self.finished - self.started) if self.started and self.finished else None
+        return {
+            "phases_seconds": dict(self.phases),
+            "startup_seconds": startup,
+            "total_seconds": sum(self.phases.values()) if startup is None
+            else self._before_begin + startup,
+        }
+
+    def summary(self) -> str:
+        parts = " ".join(f"{k}={v:.2f}s" for k, v in self.phases.items())
+        total = self.report()["total_seconds"]
+        return f"{parts} total={total:.2f}s" if total is not None else parts
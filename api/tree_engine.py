@@ -0,0 +1,256 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# rows evaluated per traversal pass; bounds the (trees x rows) index matrices
+_CHUNK_ROWS = 1024
+
+# Above this many rows sklearn's own C traversal wins over NumPy gathers despite its
+# fixed per-call overhead (~2k rows for a 100-tree Iris forest), so larger batches
+# are handed to the original model.
+MAX_COMPILED_ROWS = 2048
+
+
+def _sklearn_version():
+    import sklearn
+
+    return tuple(int(p) for p in sklearn.__version__.split(".")[:2] if p.isdigit())
+
+
+class CompiledForest:
+    """A fitted sklearn forest flattened into NumPy arrays for vectorized traversal.
+
+    All trees are concatenated into one node table. Leaves point to themselves
+    with an infinite threshold, so every row can simply take `max_depth` steps
+    through every tree at once. The arithmetic mirrors sklearn (float32 inputs,
+    per-tree normalized leaf values summed tree by tree) so predictions are
+    identical to the original estimator.
+    """
+
+    def __init__(self, feature, threshold, left, right, values, roots, max_depth,
+                 n_features, classes=None, feature_names=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.values = values
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features = n_features
+        self.classes = classes
+        self.feature_names = feature_names
+        # children interleaved as [left0, right0, left1, right1, ...] so one gather
+        # with `2 * node + go_right` picks the next node
+        self._children = np.stack([left, right], axis=1).ravel()
+
+    @property
+    def is_classifier(self) -> bool:
+        return self.classes is not None
+
+    @classmethod
+    def from_estimator(cls, est):
+        """Compile a fitted RandomForest/ExtraTrees estimator, or return None if unsupported."""
+        from sklearn.ensemble import (
+            ExtraTreesClassifier,
+            ExtraTreesRegressor,
+            RandomForestClassifier,
+            RandomForestRegressor,
+        )
+
+        if not isinstance(est, (RandomForestClassifier, ExtraTreesClassifier,
+                                RandomForestRegressor, ExtraTreesRegressor)):
+            return None
+        if not hasattr(est, "estimators_") or getattr(est, "n_outputs_", 1) != 1:
+            return None
+        is_classifier = isinstance(est, (RandomForestClassifier, ExtraTreesClassifier))
+        # sklearn >= 1.4 stores class fractions in tree_.value and returns them as-is;
+        # older versions store weighted counts and normalize in predict_proba
+        normalize = _sklearn_version() < (1, 4)
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for tree_est in est.estimators_:
+            tree = tree_est.tree_
+            n = tree.node_count
+            left = tree.children_left.astype(np.int64)
+            right = tree.children_right.astype(np.int64)
+            leaf = left == -1
+            idx = np.arange(n, dtype=np.int64)
+
+            feat = np.where(leaf, 0, tree.feature).astype(np.int64)
+            thr = np.where(leaf, np.inf, tree.threshold)
+            features.append(feat)
+            thresholds.append(thr)
+            lefts.append(np.where(leaf, idx, left) + offset)
+            rights.append(np.where(leaf, idx, right) + offset)
+
+            if is_classifier:
+                val = tree.value[:, 0, :].astype(np.float64)
+                if normalize:
+                    # same normalization as DecisionTreeClassifier.predict_proba
+                    normalizer = val.sum(axis=1)[:, np.newaxis]
+                    normalizer[normalizer == 0.0] = 1.0
+                    val = val / normalizer
+            else:
+                val = tree.value[:, 0, :1].astype(np.float64)
+            values.append(val)
+            roots.append(offset)
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        feature_names = getattr(est, "feature_names_in_", None)
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            values=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.int64),
+            max_depth=max_depth,
+            n_features=est.n_features_in_,
+            classes=est.classes_ if is_classifier else None,
+            feature_names=list(feature_names) if feature_names is not None else None,
+        )
+
+    def _leaves(self, X):
+        """Leaf node index of every (tree, row) pair."""
+        n, n_features = X.shape
+        flat = X.ravel()
+        row_base = np.arange(n, dtype=np.int64) * n_features
+        nodes = np.repeat(self.roots[:, np.newaxis], n, axis=1)
+        for _ in range(self.max_depth):
+            go_right = flat[row_base + self.feature[nodes]] > self.threshold[nodes]
+            nodes = self._children[2 * nodes + go_right]
+        return nodes
+
+    def _accumulate(self, X):
+        X = np.ascontiguousarray(X)
+        out = np.empty((X.shape[0], self.values.shape[1]), dtype=np.float64)
+        for start in range(0, X.shape[0], _CHUNK_ROWS):
+            per_tree = self.values[self._leaves(X[start:start + _CHUNK_ROWS])]
+            # add tree by tree in estimator order, exactly like sklearn; ndarray.sum
+            # would use pairwise summation and differ in the last bit
+            acc = per_tree[0].copy()
+            for t in range(1, per_tree.shape[0]):
+                acc += per_tree[t]
+            out[start:start + _CHUNK_ROWS] = acc
+        out /= self.roots.size
+        return out
+
+    def predict_proba(self, X):
+        return self._accumulate(X)
+
+    def predict(self, X):
+        out = self._accumulate(X)
+        if self.is_classifier:
+            return self.classes.take(np.argmax(out, axis=1), axis=0)
+        return out[:, 0]
+
+
+class FastTreePredictor:
+    """Drop-in `predict()` that uses a CompiledForest and delegates anything unusual.
+
+    Inputs the compiled path cannot reproduce exactly (NaNs, non-numeric data,
+    unexpected columns) go to `fallback`, the originally loaded model, so errors
+    and schema handling stay the same as before. So do batches larger than
+    `max_rows`, where sklearn's own traversal is faster.
+    """
+
+    def __init__(self, forest: CompiledForest, fallback, max_rows: int = MAX_COMPILED_ROWS):
+        self.forest = forest
+        self.fallback = fallback
+        self.max_rows = max_rows
+
+    def _to_array(self, X):
+        if len(X) > self.max_rows:
+            return None
+        names = self.forest.feature_names
+        if hasattr(X, "columns"):
+            cols = list(X.columns)
+            if names is not None:
+                if set(cols) != set(names):
+                    return None
+                if cols != names:
+                    X = X[names]
+            elif len(cols) != self.forest.n_features:
+                return None
+        try:
+            arr = np.asarray(X, dtype=np.float32)
+        except (TypeError, ValueError):
+            return None
+        if arr.ndim != 2 or arr.shape[1] != self.forest.n_features or np.isnan(arr).any():
+            return None
+        return arr
+
+    def predict(self, X):
+        arr = self._to_array(X)
+        if arr is None:
+            return self.fallback.predict(X)
+        return self.forest.predict(arr)
+
+    def predict_proba(self, X):
+        arr = self._to_array(X)
+        if arr is None:
+            return self.fallback.predict_proba(X)
+        return self.forest.predict_proba(arr)
+
+
+def unwrap_sklearn(model):
+    """Return the underlying sklearn estimator of a pyfunc or raw-wrapped model, if any."""
+    get_raw = getattr(model, "get_raw_model", None)
+    if get_raw is not None:
+        try:
+            return get_raw()
+        except Exception:
+            return None
+    return getattr(model, "_model", model)
+
+
+def _self_check_inputs(forest: CompiledForest, n_rows: int = 512, seed: int = 0):
+    """Random rows spanning each feature's split thresholds, to compare predictions on."""
+    rng = np.random.default_rng(seed)
+    X = np.zeros((n_rows, forest.n_features), dtype=np.float32)
+    finite = np.isfinite(forest.threshold)
+    for f in range(forest.n_features):
+        thr = forest.threshold[finite & (forest.feature == f)]
+        lo, hi = (thr.min(), thr.max()) if thr.size else (0.0, 1.0)
+        margin = (hi - lo) * 0.1 + 1e-3
+        X[:, f] = rng.uniform(lo - margin, hi + margin, size=n_rows)
+    return X
+
+
+def compile_model(model):
+    """Wrap `model` in a FastTreePredictor when it is a supported sklearn tree ensemble.
+
+    The compiled forest is checked against the original model on random inputs
+    and is only used if every prediction matches; otherwise None is returned.
+    """
+    est = unwrap_sklearn(model)
+    try:
+        forest = CompiledForest.from_estimator(est)
+    except Exception:
+        logger.exception("Failed to compile %s", type(est).__name__)
+        return None
+    if forest is None:
+        return None
+
+    X = _self_check_inputs(forest)
+    if forest.feature_names is not None:
+        import pandas as pd
+        X_ref = pd.DataFrame(X, columns=forest.feature_names)
+    else:
+        X_ref = X
+    try:
+        expected = np.asarray(model.predict(X_ref))
+    except Exception:
+        logger.warning("Could not self-check compiled forest; keeping original model", exc_info=True)
+        return None
+    if not np.array_equal(expected, forest.predict(X)):
+        logger.warning("Compiled forest disagrees with %s; keeping original model", type(est).__name__)
+        return None
+    logger.info("Using compiled forest for %s (%d trees, %d nodes)",
+                type(est).__name__, forest.roots.size, forest.feature.size)
+    return FastTreePredictor(forest, model)
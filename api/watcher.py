@@ -0,0 +1,120 @@
+import logging
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ModelWatcher:
+    """Follow a moving model reference and hot-swap the serving model when it changes.
+
+    Every `interval_seconds` a background thread calls `resolve_fn()` to get the
+    uri the default model should be (e.g. `models:/argo-dag-demo@champion`
+    pinned to a version). When it differs from `current_fn()`, the new model is
+    loaded with `load_fn(uri)` and warmed with `warm_fn(model)` on this thread,
+    and only then handed to `swap_fn(uri, model)`. Requests never wait for a
+    load, and a version that fails to load or warm up is not swapped in.
+
+    After a failed check the next one waits twice as long (up to
+    `max_backoff_seconds`), and a repeated failure with the same error is
+    logged at DEBUG only, so e.g. an alias that does not exist yet does not
+    produce a traceback every interval.
+    """
+
+    def __init__(self, resolve_fn, current_fn, load_fn, warm_fn, swap_fn, interval_seconds: float = 30,
+                 max_backoff_seconds: float = 600):
+        self._resolve_fn = resolve_fn
+        self._current_fn = current_fn
+        self._load_fn = load_fn
+        self._warm_fn = warm_fn
+        self._swap_fn = swap_fn
+        self.interval_seconds = interval_seconds
+        self.max_backoff_seconds = max(max_backoff_seconds, interval_seconds)
+        self._thread = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+
+        self.checks = 0
+        self.reloads = 0
+        self.failures = 0
+        self.last_check: Optional[float] = None
+        self.last_reload: Optional[float] = None
+        self.last_reload_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.target = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+        self._thread.start()
+        logger.info("Watching for new default model every %.0fs", self.interval_seconds)
+
+    def stop(self, timeout: float = 5.0):
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def check(self) -> bool:
+        """Poll once; return True if a new model was swapped in."""
+        with self._lock:
+            self.checks += 1
+            self.last_check = time.time()
+            try:
+                target = self._resolve_fn()
+                self.target = target
+                if not target or target == self._current_fn():
+                    return False
+
+                logger.info("New default model %s; loading in the background", target)
+                started = time.perf_counter()
+                m = self._load_fn(target)
+                if m is None:
+                    raise RuntimeError(f"failed to load {target}")
+                self._warm_fn(m)
+                self._swap_fn(target, m)
+                self.last_reload_seconds = time.perf_counter() - started
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                if error != self.last_error:
+                    logger.warning("Model reload check failed: %s (retrying with backoff)", error,
+                                   exc_info=logger.isEnabledFor(logging.DEBUG))
+                else:
+                    logger.debug("Model reload check failed again: %s", error)
+                self.last_error = error
+                self.failures += 1
+                return False
+            self.failures = 0
+            self.reloads += 1
+            self.last_reload = time.time()
+            self.last_error = None
+            logger.info("Swapped default model to %s (load + warm-up %.2fs)", target, self.last_reload_seconds)
+            return True
+
+    def stats(self) -> dict:
+        return {
+            "interval_seconds": self.interval_seconds,
+            "next_check_seconds": self.next_delay(),
+            "consecutive_failures": self.failures,
+            "target": self.target,
+            "checks": self.checks,
+            "reloads": self.reloads,
+            "last_check": self.last_check,
+            "last_reload": self.last_reload,
+            "last_reload_seconds": self.last_reload_seconds,
+            "last_error": self.last_error,
+        }
+
+    def next_delay(self) -> float:
+        """Seconds until the next check: the interval, doubled per consecutive failure."""
+        if not self.failures:
+            return self.interval_seconds
+        return min(self.interval_seconds * 2 ** min(self.failures, 16), self.max_backoff_seconds)
+
+    def _run(self):
+        while not self._stopping.wait(self.next_delay()):
+            self.check()
@@ -0,0 +1,108 @@
+import os
+
+import pandas as pd
+
+# Intermediate table written by preprocess.py: "parquet", "arrow" (Arrow IPC file, memory-mappable)
+# or "csv". Empty = from the output file's extension.
+INTERMEDIATE_FORMAT = os.environ.get("INTERMEDIATE_FORMAT", "")
+# Codec for parquet (snappy, zstd, gzip, none) and arrow (lz4, zstd, none). Uncompressed
+# Arrow files are read zero-copy through mmap; compressed ones are decompressed into memory.
+INTERMEDIATE_COMPRESSION = os.environ.get("INTERMEDIATE_COMPRESSION", "")
+
+_DEFAULT_COMPRESSION = {"parquet": "zstd", "arrow": "none"}
+_EXTENSIONS = {".parquet": "parquet", ".pq": "parquet", ".arrow": "arrow", ".feather": "arrow", ".csv": "csv"}
+
+
+def table_format(path: str) -> str:
+    """Format of an existing file, from its magic bytes (the file name may not match)."""
+    with open(path, "rb") as f:
+        head = f.read(6)
+    if head[:4] == b"PAR1":
+        return "parquet"
+    if head == b"ARROW1":
+        return "arrow"
+    return "csv"
+
+
+def _arrow_schema(df: pd.DataFrame):
+    """Explicit schema: float64 features and an int64 target, instead of pandas' inference."""
+    import pyarrow as pa
+
+    fields = [pa.field(c, pa.int64() if c == "target" else pa.float64(), nullable=False) for c in df.columns]
+    return pa.schema(fields)
+
+
+def write_table(df: pd.DataFrame, path: str, fmt: str = INTERMEDIATE_FORMAT, compression: str = INTERMEDIATE_COMPRESSION):
+    fmt = fmt or _EXTENSIONS.get(os.path.splitext(path)[1].lower(), "csv")
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+        return fmt
+    import pyarrow as pa
+
+    compression = compression or _DEFAULT_COMPRESSION[fmt]
+    codec = None if compression == "none" else compression
+    table = pa.Table.from_pandas(df, schema=_arrow_schema(df), preserve_index=False)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, path, compression=codec or "none", row_group_size=100_000)
+    elif fmt == "arrow":
+        import pyarrow.ipc as ipc
+
+        with pa.OSFile(path, "wb") as sink, ipc.new_file(sink, table.schema,
+                                                         options=ipc.IpcWriteOptions(compression=codec)) as writer:
+            writer.write_table(table, max_chunksize=100_000)
+    else:
+        raise ValueError(f"Unknown intermediate format: {fmt}")
+    return fmt
+
+
+def _open_arrow(path: str, columns=None):
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    table = ipc.open_file(pa.memory_map(path, "r")).read_all()
+    return table.select(columns) if columns is not None else table
+
+
+def read_table(path: str, columns=None) -> pd.DataFrame:
+    """Read a table written by write_table (or any CSV); `columns` reads only those columns."""
+    fmt = table_format(path)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        return pq.read_table(path, columns=columns, memory_map=True).to_pandas()
+    if fmt == "arrow":
+        return _open_arrow(path, columns).to_pandas()
+    return pd.read_csv(path, usecols=columns)
+
+
+def iter_chunks(path: str, chunk_rows: int = 100_000, columns=None):
+    """Yield the table at `path` as DataFrames of at most `chunk_rows` rows.
+
+    CSV is read with pandas' chunked reader, Parquet batch by batch from its
+    row groups and Arrow IPC from the memory-mapped file, so only one chunk is
+    converted to pandas at a time. `columns` limits the columns read.
+    """
+    fmt = table_format(path)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        pf = pq.ParquetFile(path)
+        for batch in pf.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+        return
+    if fmt == "arrow":
+        for batch in _open_arrow(path, columns).to_batches(max_chunksize=chunk_rows):
+            yield batch.to_pandas()
+        return
+    yield from pd.read_csv(path, chunksize=chunk_rows, usecols=columns)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MiB."""
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if os.uname().sysname == "Darwin" else peak / 1024
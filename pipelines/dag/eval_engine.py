@@ -0,0 +1,110 @@
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from dataio import iter_chunks
+from model_io import load_model
+
+
+class StreamingMetrics:
+    """Accuracy, log-loss, confusion matrix and per-class metrics accumulated chunk by chunk.
+
+    Only counts and sums are kept, so memory does not depend on the number of
+    rows. Partial results from several processes are combined with `merge`.
+    """
+
+    def __init__(self, classes):
+        self.classes = np.asarray(classes)
+        self.confusion = np.zeros((len(self.classes), len(self.classes)), dtype=np.int64)
+        self.log_loss_sum = 0.0
+        self.rows = 0
+
+    def update(self, y_true, proba):
+        """Add a chunk: true labels and the model's predict_proba output (columns = classes)."""
+        y_idx = np.searchsorted(self.classes, y_true)
+        y_idx = np.clip(y_idx, 0, len(self.classes) - 1)
+        if not np.array_equal(self.classes[y_idx], np.asarray(y_true)):
+            raise ValueError("y_true contains labels the model does not know")
+        # predictions are the argmax of the same probabilities; no second predict() pass
+        pred_idx = proba.argmax(axis=1)
+        np.add.at(self.confusion, (y_idx, pred_idx), 1)
+        # same clipping as sklearn.metrics.log_loss
+        eps = np.finfo(proba.dtype).eps
+        p_true = np.clip(proba[np.arange(len(y_idx)), y_idx], eps, 1 - eps)
+        self.log_loss_sum -= float(np.log(p_true).sum())
+        self.rows += len(y_idx)
+
+    def merge(self, other: "StreamingMetrics"):
+        self.confusion += other.confusion
+        self.log_loss_sum += other.log_loss_sum
+        self.rows += other.rows
+        return self
+
+    def result(self) -> dict:
+        tp = np.diag(self.confusion).astype(float)
+        predicted = self.confusion.sum(axis=0)
+        support = self.confusion.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            precision = np.where(predicted > 0, tp / predicted, 0.0)
+            recall = np.where(support > 0, tp / support, 0.0)
+            f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+        per_class = {
+            str(c): {"precision": float(precision[i]), "recall": float(recall[i]), "f1": float(f1[i]),
+                     "support": int(support[i])}
+            for i, c in enumerate(self.classes)
+        }
+        return {
+            "rows": self.rows,
+            "accuracy": float(tp.sum() / self.rows) if self.rows else 0.0,
+            "loss": self.log_loss_sum / self.rows if self.rows else 0.0,
+            "per_class": per_class,
+            "confusion_matrix": self.confusion.tolist(),
+            "labels": [str(c) for c in self.classes],
+        }
+
+
+_model = None
+
+
+def _init_worker(model_path):
+    global _model
+    _model = load_model(model_path)
+
+
+def _chunk_metrics(chunk, model=None):
+    m = model if model is not None else _model
+    metrics = StreamingMetrics(m.classes_)
+    metrics.update(chunk["target"].to_numpy(), m.predict_proba(chunk.drop("target", axis=1)))
+    return metrics
+
+
+def evaluate(model_path: str, data_path: str, columns=None, chunk_rows: int = 100_000, workers: int = 1,
+             model=None) -> dict:
+    """Evaluate the model at `model_path` on the table at `data_path` in chunks of `chunk_rows`.
+
+    With `workers` > 1 chunks are scored in a process pool whose workers load
+    the model once; at most 2 * workers chunks are in flight.
+    """
+    if model is None:
+        model = load_model(model_path)
+    total = StreamingMetrics(model.classes_)
+    chunks = iter_chunks(data_path, chunk_rows, columns=columns)
+    if workers <= 1:
+        for chunk in chunks:
+            total.merge(_chunk_metrics(chunk, model))
+        return total.result()
+
+    # fork: evaluate.py is a plain script without a __main__ guard, which spawn would re-run
+    ctx = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                             initargs=(model_path,)) as pool:
+        pending: deque = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_chunk_metrics, chunk))
+            if len(pending) >= 2 * workers:
+                total.merge(pending.popleft().result())
+        while pending:
+            total.merge(pending.popleft().result())
+    return total.result()
@@ -1,10 +1,15 @@
-import pandas as pd
-import joblib
-from sklearn.metrics import accuracy_score, log_loss
+import os
+
 import mlflow
 from mlflow.tracking import MlflowClient
 
-mlflow.set_tracking_uri("http://mlflow-svc.mlflow.svc.cluster.local:5000")
+from eval_engine import evaluate
+from mlflow_batch import BatchLogger
+from model_io import load_model
+from step_cache import mlflow_tags, parse_status
+
+# MLFLOW_TRACKING_URI (e.g. file:///tmp/mlruns) overrides the in-cluster server for local runs
+mlflow.set_tracking_uri(os.environ.get("MLFLOW_TRACKING_URI", "http://mlflow-svc.mlflow.svc.cluster.local:5000"))
 EXPERIMENT_NAME = "argo-dag-demo"
 
 # Ensure the experiment exists and is not deleted. If it's deleted, restore it so
@@ -16,21 +21,39 @@ if exp is not None and exp.lifecycle_stage == "deleted":
 
 mlflow.set_experiment(EXPERIMENT_NAME)
 
-df = pd.read_csv("/inputs/preprocessed.csv")
-X = df.drop("target", axis=1)
-y = df["target"]
-
-model = joblib.load("/inputs/model.pkl")
-preds = model.predict(X)
-acc = accuracy_score(y, preds)
-
-# Replace model.predict with model.predict_proba to calculate log_loss correctly
-probs = model.predict_proba(X)  # クラス確率を取得
-loss = log_loss(y, probs)  # クラス確率を使用して log_loss を計算
+# Step cache results of preprocess / train, passed in from their Argo output parameters
+step_cache_statuses = [parse_status(os.environ.get(var)) for var in ("STEP_CACHE_PREPROCESS", "STEP_CACHE_TRAIN")]
+
+MODEL_PATH = "/inputs/model.pkl"
+# Rows scored per chunk and processes scoring chunks in parallel (1 = in this process)
+EVAL_CHUNK_ROWS = int(os.environ.get("EVAL_CHUNK_ROWS", "100000"))
+EVAL_WORKERS = int(os.environ.get("EVAL_WORKERS", "1"))
+# The new version becomes the "champion" alias (followed by the API's MODEL_WATCH_URI)
+# when its accuracy reaches this threshold.
+CHAMPION_ALIAS = os.environ.get("CHAMPION_ALIAS", "champion")
+CHAMPION_MIN_ACCURACY = float(os.environ.get("CHAMPION_MIN_ACCURACY", "0.9"))
+
+model = load_model(MODEL_PATH)
+
+# read only the model's feature columns and the target from the intermediate table
+columns = None
+if hasattr(model, "feature_names_in_"):
+    columns = list(model.feature_names_in_) + ["target"]
+# predict_proba runs once per chunk; predictions are its argmax (see eval_engine.py)
+result = evaluate(MODEL_PATH, os.environ.get("EVAL_INPUT", "/inputs/preprocessed.parquet"), columns=columns,
+                  chunk_rows=EVAL_CHUNK_ROWS, workers=EVAL_WORKERS, model=model)
+acc = result["accuracy"]
+loss = result["loss"]
 
 with mlflow.start_run() as run:
-    mlflow.log_metric("accuracy", acc)
-    mlflow.log_metric("loss", loss)
+    # metrics and tags are buffered and sent as one log_batch in the background while
+    # the model is uploaded; closed (flushed) before the run ends
+    ml = BatchLogger(run.info.run_id, client=client)
+    ml.log_metrics({"accuracy": acc, "loss": loss})
+    for label, m in result["per_class"].items():
+        ml.log_metrics({f"{k}_class_{label}": v for k, v in m.items()})
+    ml.set_tags(mlflow_tags(step_cache_statuses))
+    mlflow.log_dict({"labels": result["labels"], "matrix": result["confusion_matrix"]}, "confusion_matrix.json")
     # Save model in MLflow format so an MLmodel metadata file is created
     try:
         import mlflow.sklearn
@@ -40,7 +63,6 @@ with mlflow.start_run() as run:
         # If structured logging fails, fall back to raw artifact upload to avoid breaking pipeline
         mlflow.log_artifact("/inputs/model.pkl", artifact_path="model")
 
-    client = MlflowClient()
     # model_uri = f"runs:/{run.info.run_id}/model"
     # Get the REAL artifact URI (S3/MinIO path)
     artifact_uri = mlflow.get_artifact_uri("model")
@@ -60,11 +82,18 @@ with mlflow.start_run() as run:
         else:
             raise
 
-    client.create_model_version(
+    mv = client.create_model_version(
         name=EXPERIMENT_NAME,
         source=artifact_uri,
         run_id=run.info.run_id
     )
+    if acc >= CHAMPION_MIN_ACCURACY:
+        client.set_registered_model_alias(EXPERIMENT_NAME, CHAMPION_ALIAS, mv.version)
+        print(f"Version {mv.version} is now @{CHAMPION_ALIAS}")
+    else:
+        print(f"Version {mv.version} not promoted: accuracy {acc:.4f} < {CHAMPION_MIN_ACCURACY}")
+    ml.set_tag("champion", str(acc >= CHAMPION_MIN_ACCURACY).lower())
+    ml.close()
 
 
 print(f"Accuracy: {acc}, Loss: {loss}")
@@ -0,0 +1,204 @@
+import atexit
+import logging
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# log_batch limits of the tracking server (at most _MAX_ENTITIES in total)
+_MAX_METRICS = 1000
+_MAX_PARAMS = 100
+_MAX_TAGS = 100
+_MAX_ENTITIES = 1000
+
+# MLflow error codes worth retrying. Besides these only network errors (connection
+# refused/reset, timeouts) are retried; anything else is a bug or a rejected batch.
+_TRANSIENT_CODES = {"INTERNAL_ERROR", "TEMPORARILY_UNAVAILABLE", "REQUEST_LIMIT_EXCEEDED", "DEADLINE_EXCEEDED"}
+
+
+def _is_transient(e: Exception) -> bool:
+    import requests
+    from mlflow.exceptions import MlflowException
+
+    if isinstance(e, MlflowException):
+        return e.error_code in _TRANSIENT_CODES
+    # builtin ConnectionError/TimeoutError only: a bare OSError would also match requests' HTTPError (4xx)
+    return isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                          ConnectionError, TimeoutError))
+
+
+class BatchLogger:
+    """Buffer metrics, params and tags and send them with `log_batch` from a background thread.
+
+    Calls return immediately. The buffer is flushed every `flush_interval`
+    seconds, as soon as a full batch is waiting, on `flush()` / `close()` and
+    at interpreter exit. Transient failures are retried up to `max_retries`
+    times with exponential backoff starting at `backoff` seconds; a batch that
+    still fails is dropped and logged so a tracking outage does not fail the
+    step. Any other error is not retried: the batch is dropped and the error is
+    raised from the next `flush()` or `close()`.
+
+        with BatchLogger(run.info.run_id) as ml:
+            ml.log_metrics({"accuracy": acc, "loss": loss})
+            ml.set_tags(tags)
+    """
+
+    def __init__(self, run_id: str, client=None, flush_interval: float = 2.0, max_retries: int = 5,
+                 backoff: float = 0.5):
+        if client is None:
+            from mlflow.tracking import MlflowClient
+
+            client = MlflowClient()
+        self.run_id = run_id
+        self._client = client
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._metrics: list = []
+        self._params: list = []
+        self._tags: list = []
+        self._cond = threading.Condition()
+        self._pending = 0
+        self._closed = False
+        self._flush_requested = False
+        self._error: Optional[Exception] = None
+        self.batches_sent = 0
+        self.failed_batches = 0
+        self._thread = threading.Thread(target=self._run, name="mlflow-batch", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log_metric(self, key: str, value: float, step: int = 0, timestamp: Optional[int] = None):
+        from mlflow.entities import Metric
+
+        ts = timestamp if timestamp is not None else int(time.time() * 1000)
+        self._add(self._metrics, Metric(key, float(value), ts, step), full=_MAX_METRICS)
+
+    def log_metrics(self, metrics: dict, step: int = 0):
+        ts = int(time.time() * 1000)
+        for key, value in metrics.items():
+            self.log_metric(key, value, step=step, timestamp=ts)
+
+    def log_param(self, key: str, value):
+        from mlflow.entities import Param
+
+        self._add(self._params, Param(key, str(value)), full=_MAX_PARAMS)
+
+    def log_params(self, params: dict):
+        for key, value in params.items():
+            self.log_param(key, value)
+
+    def set_tag(self, key: str, value):
+        from mlflow.entities import RunTag
+
+        self._add(self._tags, RunTag(key, str(value)), full=_MAX_TAGS)
+
+    def set_tags(self, tags: dict):
+        for key, value in tags.items():
+            self.set_tag(key, value)
+
+    def _add(self, buffer: list, entity, full: int):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("BatchLogger is closed")
+            buffer.append(entity)
+            self._pending += 1
+            if len(buffer) >= full:
+                self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything logged so far has been sent (or dropped); False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._pending and self._thread.is_alive():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        self._raise_error()
+        return not self._pending
+
+    def close(self, timeout: Optional[float] = None):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        atexit.unregister(self.close)
+        self._raise_error()
+
+    def _raise_error(self):
+        """Re-raise (once) a non-transient error the background thread ran into."""
+        with self._cond:
+            error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _take(self):
+        """Pop one log_batch worth of entities (called with the lock held).
+
+        The buffers are trimmed in place: callers pick the buffer before taking
+        the lock, so replacing the list could drop an entity appended to the old one.
+        """
+        params = self._params[:_MAX_PARAMS]
+        del self._params[:_MAX_PARAMS]
+        tags = self._tags[:_MAX_TAGS]
+        del self._tags[:_MAX_TAGS]
+        n = min(_MAX_METRICS, _MAX_ENTITIES - len(params) - len(tags))
+        metrics = self._metrics[:n]
+        del self._metrics[:n]
+        return metrics, params, tags
+
+    def _full(self) -> bool:
+        return len(self._metrics) >= _MAX_METRICS or len(self._params) >= _MAX_PARAMS or len(self._tags) >= _MAX_TAGS
+
+    def _run(self):
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval
+                while not (self._closed or self._flush_requested or self._full()):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if not self._pending:
+                    self._flush_requested = False
+                    if self._closed:
+                        return
+                    continue
+                metrics, params, tags = self._take()
+            self._send(metrics, params, tags)
+            with self._cond:
+                self._pending -= len(metrics) + len(params) + len(tags)
+                self._cond.notify_all()
+
+    def _send(self, metrics, params, tags):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._client.log_batch(self.run_id, metrics=metrics, params=params, tags=tags)
+                self.batches_sent += 1
+                return
+            except Exception as e:
+                transient = _is_transient(e)
+                if attempt == self.max_retries or not transient:
+                    self.failed_batches += 1
+                    logger.error("Dropping MLflow batch (%d metrics, %d params, %d tags) for run %s: %s",
+                                 len(metrics), len(params), len(tags), self.run_id, e)
+                    if not transient:
+                        with self._cond:
+                            if self._error is None:
+                                self._error = e
+                    return
+                delay = self.backoff * 2 ** attempt
+                logger.warning("MLflow log_batch failed (%s); retrying in %.1fs", e, delay)
+                time.sleep(delay)
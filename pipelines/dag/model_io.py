@@ -0,0 +1,33 @@
+import os
+
+import joblib
+
+# How train.py writes model.pkl:
+#   "mmap"       joblib without compression. NumPy arrays are stored raw (aligned) after the
+#                pickle stream and are loaded with mmap_mode="r" instead of being read and copied.
+#   "compressed" joblib with MODEL_COMPRESS / MODEL_COMPRESS_LEVEL, smaller to upload and
+#                download but fully decompressed into memory on load.
+MODEL_FORMAT = os.environ.get("MODEL_FORMAT", "mmap").lower()
+MODEL_COMPRESS = os.environ.get("MODEL_COMPRESS", "zlib")
+MODEL_COMPRESS_LEVEL = int(os.environ.get("MODEL_COMPRESS_LEVEL", "3"))
+
+
+def save_model(model, path: str, fmt: str = MODEL_FORMAT):
+    if fmt == "mmap":
+        joblib.dump(model, path)
+    elif fmt == "compressed":
+        joblib.dump(model, path, compress=(MODEL_COMPRESS, MODEL_COMPRESS_LEVEL))
+    else:
+        raise ValueError(f"Unknown MODEL_FORMAT: {fmt}")
+
+
+def is_compressed(path: str) -> bool:
+    """True for compressed joblib files; uncompressed ones start with the pickle protocol opcode."""
+    # pickle PROTO opcode 0x80 vs. the zlib/gzip/lz4 header written by joblib compression
+    with open(path, "rb") as f:
+        return f.read(1) != b"\x80"
+
+
+def load_model(path: str, mmap_mode: str = "r"):
+    """joblib.load, memory-mapping the arrays of uncompressed files."""
+    return joblib.load(path, mmap_mode=None if is_compressed(path) else mmap_mode)
@@ -1,9 +1,27 @@
+import os
+
 import pandas as pd
 from sklearn.datasets import load_iris
 
-iris = load_iris()
-df = pd.DataFrame(iris.data, columns=iris.feature_names)
-df["target"] = iris.target
+import dataio
+from dataio import write_table
+from step_cache import cached_step
+
+# Parquet by default; a .csv / .arrow path (or INTERMEDIATE_FORMAT) selects the other formats.
+PREPROCESS_OUTPUT = os.environ.get("PREPROCESS_OUTPUT", "/outputs/preprocessed.parquet")
+
+
+def preprocess():
+    iris = load_iris()
+    df = pd.DataFrame(iris.data, columns=iris.feature_names)
+    df["target"] = iris.target
+
+    fmt = write_table(df, PREPROCESS_OUTPUT)
+    print(f"Wrote {len(df)} rows to {PREPROCESS_OUTPUT} ({fmt})")
+
 
-df.to_csv("/outputs/preprocessed.csv", index=False)
+cached_step("preprocess", {os.path.basename(PREPROCESS_OUTPUT): PREPROCESS_OUTPUT}, preprocess,
+            code=[__file__, dataio.__file__],
+            params={"output": PREPROCESS_OUTPUT, "format": os.environ.get("INTERMEDIATE_FORMAT", ""),
+                    "compression": os.environ.get("INTERMEDIATE_COMPRESSION", "")})
 print("Preprocessing done.")
@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Optional
+
+# Where step outputs are memoized: a local directory or s3://bucket/prefix (MinIO via
+# MLFLOW_S3_ENDPOINT_URL). Unset disables caching and every step runs.
+STEP_CACHE_URI = os.environ.get("STEP_CACHE_URI", "")
+# Result of the lookup, exposed to Argo as an output parameter (see format_status).
+STEP_CACHE_STATUS_PATH = os.environ.get("STEP_CACHE_STATUS_PATH", "/outputs/step_cache")
+
+_META_FILE = "meta.json"
+
+
+def _hash_file(h, path: str):
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+
+
+def fingerprint(step: str, inputs=(), code=(), params=None) -> str:
+    """sha256 over the step name, input files, code files, parameters and library versions."""
+    import pandas
+    import sklearn
+
+    h = hashlib.sha256()
+    h.update(step.encode())
+    for kind, paths in (("input", inputs), ("code", code)):
+        for path in paths:
+            h.update(f"\0{kind}:{os.path.basename(path)}\0".encode())
+            _hash_file(h, path)
+    env = {"pandas": pandas.__version__, "sklearn": sklearn.__version__}
+    h.update(json.dumps({"params": params or {}, "libs": env}, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+class LocalStore:
+    def __init__(self, root: str):
+        self.root = root
+
+    def get(self, key: str, outputs: dict):
+        entry = os.path.join(self.root, key)
+        try:
+            with open(os.path.join(entry, _META_FILE)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        for name, path in outputs.items():
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            shutil.copyfile(os.path.join(entry, name), path)
+        return meta
+
+    def put(self, key: str, outputs: dict, meta: dict):
+        entry = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=os.path.dirname(entry))
+        try:
+            for name, path in outputs.items():
+                shutil.copyfile(path, os.path.join(tmp, name))
+            with open(os.path.join(tmp, _META_FILE), "w") as f:
+                json.dump(meta, f)
+            os.rename(tmp, entry)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            # another run may have stored the same key first
+            if not os.path.exists(os.path.join(entry, _META_FILE)):
+                raise
+
+
+class S3Store:
+    def __init__(self, uri: str):
+        import boto3
+
+        bucket, _, prefix = uri[len("s3://"):].partition("/")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.client = boto3.client("s3", endpoint_url=os.environ.get("MLFLOW_S3_ENDPOINT_URL") or None)
+
+    def _key(self, key: str, name: str) -> str:
+        return "/".join(p for p in (self.prefix, key, name) if p)
+
+    def get(self, key: str, outputs: dict):
+        from botocore.exceptions import ClientError
+
+        try:
+            body = self.client.get_object(Bucket=self.bucket, Key=self._key(key, _META_FILE))["Body"]
+            meta = json.loads(body.read())
+        except ClientError:
+            return None
+        for name, path in outputs.items():
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self.client.download_file(self.bucket, self._key(key, name), path)
+        return meta
+
+    def put(self, key: str, outputs: dict, meta: dict):
+        for name, path in outputs.items():
+            self.client.upload_file(path, self.bucket, self._key(key, name))
+        # meta.json last: an entry is only visible once all outputs are uploaded
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key, _META_FILE), Body=json.dumps(meta).encode())
+
+
+def open_store(uri: str = STEP_CACHE_URI):
+    if not uri:
+        return None
+    if uri.startswith("s3://"):
+        return S3Store(uri)
+    return LocalStore(uri)
+
+
+def cached_step(step: str, outputs: dict, run, inputs=(), code=(), params=None, store=None):
+    """Restore `outputs` ({name: path}) for this fingerprint, or call `run()` and store them.
+
+    Writes the lookup result (hit, key, compute seconds and seconds saved) to
+    STEP_CACHE_STATUS_PATH and returns it. Cache errors never fail the step.
+    """
+    store = store if store is not None else open_store()
+    status = {"step": step, "enabled": store is not None, "hit": False, "key": None}
+    if store is not None:
+        try:
+            status["key"] = key = f"{step}/{fingerprint(step, inputs, code, params)}"
+            meta = store.get(key, outputs)
+            if meta is not None:
+                status.update(hit=True, saved_seconds=meta.get("compute_seconds"))
+                print(f"Step cache hit for {step} ({key}); skipping compute")
+        except Exception as e:
+            print(f"Step cache lookup failed for {step}: {e}")
+            status["error"] = str(e)
+
+    if not status["hit"]:
+        started = time.perf_counter()
+        run()
+        status["compute_seconds"] = time.perf_counter() - started
+        if store is not None and status["key"] is not None:
+            try:
+                store.put(status["key"], outputs, {"step": step, "created": time.time(),
+                                                   "compute_seconds": status["compute_seconds"]})
+            except Exception as e:
+                print(f"Could not store {step} outputs in the step cache: {e}")
+
+    _write_status(status)
+    return status
+
+
+def _write_status(status: dict):
+    path = STEP_CACHE_STATUS_PATH
+    if not path:
+        return
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            f.write(format_status(status))
+    except OSError as e:
+        print(f"Could not write step cache status to {path}: {e}")
+
+
+def format_status(status: dict) -> str:
+    """`<step> <hit|miss|off> <key> <seconds>`; plain words so it can be templated into YAML.
+
+    <seconds> is the compute time on a miss and the compute time saved on a hit.
+    """
+    result = "off" if not status["enabled"] else ("hit" if status["hit"] else "miss")
+    seconds = status.get("saved_seconds") if status["hit"] else status.get("compute_seconds")
+    return f"{status['step']} {result} {status.get('key') or '-'} {seconds or 0:.1f}"
+
+
+def parse_status(text: Optional[str]):
+    """Inverse of format_status; None for empty or malformed values."""
+    parts = (text or "").split()
+    if len(parts) != 4:
+        return None
+    step, result, key, value = parts
+    try:
+        seconds = float(value)
+    except ValueError:
+        return None
+    return {"step": step, "enabled": result != "off", "hit": result == "hit",
+            "key": None if key == "-" else key, "saved_seconds" if result == "hit" else "compute_seconds": seconds}
+
+
+def mlflow_tags(statuses) -> dict:
+    """MLflow run tags for the step cache results passed on from earlier steps."""
+    tags = {}
+    saved = 0.0
+    for status in statuses:
+        if not status or not status.get("enabled"):
+            continue
+        step = status["step"]
+        tags[f"step_cache.{step}"] = "hit" if status["hit"] else "miss"
+        tags[f"step_cache.{step}.key"] = status.get("key") or ""
+        if status["hit"] and status.get("saved_seconds"):
+            saved += status["saved_seconds"]
+    if tags:
+        tags["step_cache.saved_seconds"] = f"{saved:.1f}"
+    return tags
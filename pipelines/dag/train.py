@@ -1,13 +1,251 @@
+import json
+import os
+import time
+
+import numpy as np
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
-import joblib
 
-df = pd.read_csv("/inputs/preprocessed.csv")
-X = df.drop("target", axis=1)
-y = df["target"]
+import dataio
+import model_io
+from dataio import iter_chunks, peak_rss_mb, read_table
+from model_io import save_model
+from step_cache import cached_step
+
+# TRAIN_MODE=tune runs a parallel hyperparameter search instead of a single default fit;
+# TRAIN_MODE=stream trains out of core, one chunk of the input at a time.
+TRAIN_MODE = os.environ.get("TRAIN_MODE", "default").lower()
+TRAIN_INPUT = os.environ.get("TRAIN_INPUT", "/inputs/preprocessed.parquet")
+MODEL_OUTPUT = "/outputs/model.pkl"
+# Parallel workers for the search (-1 = all cores). Each forest is fit single-threaded,
+# so the cores are spent on candidates x CV folds instead.
+TUNE_N_JOBS = int(os.environ.get("TUNE_N_JOBS", "-1"))
+TUNE_N_CANDIDATES = int(os.environ.get("TUNE_N_CANDIDATES", "16"))
+TUNE_CV = int(os.environ.get("TUNE_CV", "5"))
+# Successive halving: after each round only the best 1/TUNE_FACTOR candidates get more data.
+TUNE_FACTOR = int(os.environ.get("TUNE_FACTOR", "3"))
+TUNE_SCORING = os.environ.get("TUNE_SCORING", "neg_log_loss")
+TUNE_SEED = int(os.environ.get("TUNE_SEED", "0"))
+# JSON object of parameter -> list of values; overrides DEFAULT_SEARCH_SPACE.
+TUNE_SEARCH_SPACE = os.environ.get("TUNE_SEARCH_SPACE", "")
+# Streaming mode: rows per chunk (CSV chunk / Parquet batch) bound the data held in memory.
+STREAM_CHUNK_ROWS = int(os.environ.get("STREAM_CHUNK_ROWS", "100000"))
+# "sgd": StandardScaler + SGDClassifier via partial_fit; "forest": a few trees per chunk.
+STREAM_ESTIMATOR = os.environ.get("STREAM_ESTIMATOR", "sgd").lower()
+STREAM_EPOCHS = int(os.environ.get("STREAM_EPOCHS", "3"))
+STREAM_TREES_PER_CHUNK = int(os.environ.get("STREAM_TREES_PER_CHUNK", "10"))
+STREAM_MIN_SAMPLES_LEAF = int(os.environ.get("STREAM_MIN_SAMPLES_LEAF", "5"))
+EXPERIMENT_NAME = os.environ.get("MLFLOW_EXPERIMENT_NAME", "argo-dag-demo")
+
+DEFAULT_SEARCH_SPACE = {
+    "n_estimators": [50, 100, 200],
+    "max_depth": [None, 4, 8, 16],
+    "min_samples_leaf": [1, 2, 4, 8],
+    "max_features": ["sqrt", "log2", None],
+    "criterion": ["gini", "entropy"],
+    "bootstrap": [True, False],
+}
+
+
+def search_space():
+    if TUNE_SEARCH_SPACE:
+        return json.loads(TUNE_SEARCH_SPACE)
+    return DEFAULT_SEARCH_SPACE
+
+
+def tune(X, y):
+    """Successive-halving random search; returns the fitted search object."""
+    # HalvingRandomSearchCV is still experimental in scikit-learn
+    from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+    from sklearn.model_selection import HalvingRandomSearchCV
+
+    search = HalvingRandomSearchCV(
+        RandomForestClassifier(n_jobs=1, random_state=TUNE_SEED),
+        search_space(),
+        n_candidates=TUNE_N_CANDIDATES,
+        factor=TUNE_FACTOR,
+        cv=TUNE_CV,
+        scoring=TUNE_SCORING,
+        n_jobs=TUNE_N_JOBS,
+        random_state=TUNE_SEED,
+        refit=True,
+    )
+    search.fit(X, y)
+    return search
+
+
+def log_trials(search, seconds):
+    """One parent MLflow run for the search and a nested run per evaluated candidate.
+
+    The child runs are created up front; their params and metrics go through a
+    BatchLogger each, so the trials are sent concurrently with one log_batch
+    per run instead of a blocking start_run/log/end_run sequence per trial.
+    """
+    import mlflow
+    from mlflow.entities import RunStatus
+    from mlflow.tracking import MlflowClient
+    from mlflow.utils.mlflow_tags import MLFLOW_PARENT_RUN_ID
+
+    from mlflow_batch import BatchLogger
+
+    mlflow.set_experiment(EXPERIMENT_NAME)
+    client = MlflowClient()
+    results = search.cv_results_
+    with mlflow.start_run(run_name="tune") as parent:
+        with BatchLogger(parent.info.run_id, client=client) as ml:
+            ml.set_tag("stage", "tune")
+            ml.log_params({f"best_{k}": v for k, v in search.best_params_.items()})
+            ml.log_params({"n_candidates": TUNE_N_CANDIDATES, "factor": TUNE_FACTOR, "cv": TUNE_CV,
+                           "scoring": TUNE_SCORING, "n_jobs": TUNE_N_JOBS})
+            ml.log_metrics({"best_score": float(search.best_score_), "search_seconds": seconds,
+                            "n_trials": len(results["params"]), "n_iterations": int(search.n_iterations_)})
+
+            trials = []
+            for i, params in enumerate(results["params"]):
+                run = client.create_run(parent.info.experiment_id, run_name=f"trial-{i}",
+                                        tags={MLFLOW_PARENT_RUN_ID: parent.info.run_id})
+                trial = BatchLogger(run.info.run_id, client=client)
+                trial.log_params(params)
+                trial.log_metrics({
+                    "mean_test_score": float(results["mean_test_score"][i]),
+                    "std_test_score": float(results["std_test_score"][i]),
+                    "mean_fit_time": float(results["mean_fit_time"][i]),
+                    "iteration": int(results["iter"][i]),
+                    "n_resources": int(results["n_resources"][i]),
+                })
+                trials.append(trial)
+            for trial in trials:
+                trial.close()
+                client.set_terminated(trial.run_id, RunStatus.to_string(RunStatus.FINISHED))
+        return parent.info.run_id
+
+
+def _scan(path):
+    """First pass: class labels, a scaler fitted on all rows and one example row per class."""
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler()
+    anchors = {}
+    for chunk in iter_chunks(path, STREAM_CHUNK_ROWS):
+        X, y = chunk.drop("target", axis=1), chunk["target"]
+        scaler.partial_fit(X)
+        for label, idx in y.groupby(y).groups.items():
+            anchors.setdefault(label, chunk.loc[[idx[0]]])
+    anchors = pd.concat([anchors[k] for k in sorted(anchors)], ignore_index=True)
+    return np.asarray(sorted(anchors["target"].unique())), scaler, anchors
+
+
+def _train_stream_sgd(path, classes, scaler):
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.pipeline import make_pipeline
+
+    clf = SGDClassifier(loss="log_loss", random_state=0)
+    rows = 0
+    for epoch in range(STREAM_EPOCHS):
+        for chunk in iter_chunks(path, STREAM_CHUNK_ROWS):
+            X, y = chunk.drop("target", axis=1), chunk["target"]
+            clf.partial_fit(scaler.transform(X), y, classes=classes)
+            if epoch == 0:
+                rows += len(chunk)
+    return make_pipeline(scaler, clf), rows, STREAM_EPOCHS
+
+
+def _train_stream_forest(path, classes, anchors):
+    """Fit STREAM_TREES_PER_CHUNK trees on every chunk and merge them into one forest.
+
+    Each chunk is fit together with one example row per class so that every
+    tree has the same classes_ and their probabilities can be averaged.
+    """
+    forest = None
+    rows = 0
+    for i, chunk in enumerate(iter_chunks(path, STREAM_CHUNK_ROWS)):
+        rows += len(chunk)
+        if len(np.unique(chunk["target"])) < len(classes):
+            chunk = pd.concat([chunk, anchors], ignore_index=True)
+        part = RandomForestClassifier(n_estimators=STREAM_TREES_PER_CHUNK, min_samples_leaf=STREAM_MIN_SAMPLES_LEAF,
+                                      n_jobs=-1, random_state=i)
+        part.fit(chunk.drop("target", axis=1), chunk["target"])
+        if forest is None:
+            forest = part
+        else:
+            forest.estimators_ += part.estimators_
+        del chunk
+    forest.n_estimators = len(forest.estimators_)
+    return forest, rows, 1
+
+
+def train_stream(path):
+    started = time.perf_counter()
+    classes, scaler, anchors = _scan(path)
+    if STREAM_ESTIMATOR == "forest":
+        model, rows, passes = _train_stream_forest(path, classes, anchors)
+    elif STREAM_ESTIMATOR == "sgd":
+        model, rows, passes = _train_stream_sgd(path, classes, scaler)
+    else:
+        raise ValueError(f"Unknown STREAM_ESTIMATOR: {STREAM_ESTIMATOR}")
+    seconds = time.perf_counter() - started
+    # rows_trained and rows_per_sec count each input row once; rows_processed includes every pass
+    stats = {"rows_trained": rows, "passes": passes, "rows_processed": rows * passes, "train_seconds": seconds,
+             "rows_per_sec": rows / seconds if seconds else 0.0, "peak_rss_mb": peak_rss_mb()}
+    return model, stats
+
+
+def log_stream_run(stats):
+    import mlflow
+
+    mlflow.set_experiment(EXPERIMENT_NAME)
+    with mlflow.start_run(run_name="train-stream") as run:
+        mlflow.set_tag("stage", "train")
+        mlflow.log_params({"estimator": STREAM_ESTIMATOR, "chunk_rows": STREAM_CHUNK_ROWS,
+                           "epochs": STREAM_EPOCHS, "trees_per_chunk": STREAM_TREES_PER_CHUNK})
+        mlflow.log_metrics(stats)
+        return run.info.run_id
+
+
+def train():
+    if TRAIN_MODE == "stream":
+        model, stats = train_stream(TRAIN_INPUT)
+        print(f"Streamed {stats['rows_trained']} rows x {stats['passes']} passes in {stats['train_seconds']:.1f}s "
+              f"({stats['rows_per_sec']:.0f} rows/s), peak RSS {stats['peak_rss_mb']:.0f} MiB")
+        try:
+            run_id = log_stream_run(stats)
+            print(f"Logged training stats under MLflow run {run_id}")
+        except Exception as e:
+            print(f"Could not log training stats to MLflow: {e}")
+    elif TRAIN_MODE == "tune":
+        df = read_table(TRAIN_INPUT)
+        X = df.drop("target", axis=1)
+        y = df["target"]
+        started = time.perf_counter()
+        search = tune(X, y)
+        seconds = time.perf_counter() - started
+        model = search.best_estimator_
+        print(f"Search: {len(search.cv_results_['params'])} trials in {seconds:.1f}s, "
+              f"best {TUNE_SCORING}={search.best_score_:.4f} with {search.best_params_}")
+        try:
+            run_id = log_trials(search, seconds)
+            print(f"Logged trials under MLflow run {run_id}")
+        except Exception as e:
+            # the model is the step's output; a tracking outage should not fail training
+            print(f"Could not log trials to MLflow: {e}")
+    else:
+        df = read_table(TRAIN_INPUT)
+        X = df.drop("target", axis=1)
+        y = df["target"]
+        model = RandomForestClassifier()
+        model.fit(X, y)
+
+    save_model(model, MODEL_OUTPUT)
+
+
+def _params():
+    params = {k: v for k, v in os.environ.items() if k.startswith(("TRAIN_", "TUNE_", "STREAM_", "MODEL_"))}
+    # the effective model.pkl format, including model_io's defaults when the variables are unset
+    params.update({"MODEL_FORMAT": model_io.MODEL_FORMAT, "MODEL_COMPRESS": model_io.MODEL_COMPRESS,
+                   "MODEL_COMPRESS_LEVEL": str(model_io.MODEL_COMPRESS_LEVEL)})
+    return params
 
-model = RandomForestClassifier()
-model.fit(X, y)
 
-joblib.dump(model, "/outputs/model.pkl")
+cached_step("train", {"model.pkl": MODEL_OUTPUT}, train, inputs=[TRAIN_INPUT],
+            code=[__file__, dataio.__file__, model_io.__file__], params=_params())
 print("Training done.")
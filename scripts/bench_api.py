@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""Latency / throughput benchmark for the prediction API.
+
+Usage:
+  python scripts/bench_api.py [--model rf|stub] [--concurrency 16] [--rate 0] [--requests 2000] \
+      [--payloads payloads.jsonl] [--out results.json] [--compare baseline.json]
+  python scripts/bench_api.py --url http://127.0.0.1:8000 --version 15 ...
+
+By default api/main.py runs in-process behind httpx's ASGITransport, with no
+network, MLflow server or MinIO involved. Every model uri loads either a
+RandomForest trained on Iris (--model rf, like pipelines/dag/train.py) or a
+constant stub (--model stub, which measures pure framework overhead). Loading a
+version sleeps --cold-load-ms to stand in for the registry download.
+With --url an already running server is measured instead.
+
+Scenarios:
+  predict        POST /predict
+  version_warm   POST /predict/{version} on an already loaded version
+  version_cold   first POST /predict/{version} of never-seen versions (in-process only)
+  batch          POST /predict/batch with --batch-rows rows per request
+
+Payloads are feature dicts, one JSON object per line (--payloads), or Iris rows
+with noise. With --rate, requests are started on a fixed schedule (open loop) and
+latency is measured from the scheduled start, so queueing delay is included.
+Otherwise --concurrency workers send back to back.
+
+Results (p50/p95/p99/mean/max ms, throughput, error rate per scenario) are
+printed and written as JSON. --compare prints the change against an earlier
+run and exits with 1 if any p95 regressed by more than --max-regression.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+API_DIR = Path(__file__).resolve().parents[1] / "api"
+
+
+def load_payloads(path, n=1000, seed=0):
+    if path:
+        with open(path) as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        return [r.get("features", r) if isinstance(r, dict) else r for r in rows]
+    from sklearn.datasets import load_iris
+
+    iris = load_iris(as_frame=True)
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(iris.data), size=n)
+    values = iris.data.values[idx] + rng.normal(0, 0.2, size=(n, iris.data.shape[1]))
+    return [dict(zip(iris.data.columns, map(float, row))) for row in values]
+
+
+class _StubModel:
+    """Constant predictor with the Iris feature names (no real inference cost)."""
+
+    def __init__(self, feature_names):
+        self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+
+    def predict(self, X):
+        return np.zeros(len(X), dtype=np.int64)
+
+
+def in_process_app(kind, cold_load_ms):
+    """Import api/main.py with a local model behind every uri; returns the ASGI app."""
+    os.environ.setdefault("ARTIFACT_CACHE_DIR", "")
+    os.environ.setdefault("MLFLOW_TRACKING_URI", f"file://{tempfile.mkdtemp(prefix='bench_api_')}")
+    os.environ.setdefault("DEFAULT_MODEL_URI", "models:/argo-dag-demo/1")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    sys.path.insert(0, str(API_DIR))
+    import main
+    from sklearn.datasets import load_iris
+    from sklearn.ensemble import RandomForestClassifier
+
+    iris = load_iris(as_frame=True)
+    if kind == "stub":
+        est = _StubModel(iris.data.columns)
+    else:
+        est = RandomForestClassifier(n_estimators=100, random_state=0).fit(iris.data, iris.target)
+
+    def load(uri):
+        time.sleep(cold_load_ms / 1000)
+        return main._RawModelWrapper(est)
+
+    main._load_model = load
+    return main.app
+
+
+async def run_scenario(client, name, make_request, payloads, n_requests, concurrency, rate):
+    latencies = []
+    errors = 0
+    statuses = {}
+
+    async def one(i, scheduled=None):
+        nonlocal errors
+        method, url, kwargs = make_request(i, payloads[i % len(payloads)])
+        started = scheduled if scheduled is not None else time.perf_counter()
+        try:
+            r = await client.request(method, url, **kwargs)
+            status = r.status_code
+        except httpx.HTTPError:
+            status = 0
+        latencies.append(time.perf_counter() - started)
+        statuses[status] = statuses.get(status, 0) + 1
+        if status != 200:
+            errors += 1
+
+    t0 = time.perf_counter()
+    if rate > 0:
+        tasks = []
+        for i in range(n_requests):
+            scheduled = t0 + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(i, scheduled)))
+        await asyncio.gather(*tasks)
+    else:
+        counter = iter(range(n_requests))
+
+        async def worker():
+            for i in counter:
+                await one(i)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+
+    ms = np.asarray(latencies) * 1000
+    return {
+        "requests": n_requests,
+        "errors": errors,
+        "error_rate": errors / n_requests if n_requests else 0.0,
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "seconds": elapsed,
+        "throughput_rps": n_requests / elapsed if elapsed > 0 else None,
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+    }
+
+
+async def bench(args, payloads):
+    scenarios = {}
+    warm_version = args.version or "2"
+
+    def predict(i, p):
+        return "POST", "/predict", {"json": p}
+
+    def version_warm(i, p):
+        return "POST", f"/predict/{warm_version}", {"json": p}
+
+    def version_cold(i, p):
+        return "POST", f"/predict/{10000 + i}", {"json": p}
+
+    def batch(i, p):
+        rows = [payloads[(i * args.batch_rows + j) % len(payloads)] for j in range(args.batch_rows)]
+        return "POST", "/predict/batch", {"json": rows}
+
+    plan = [("predict", predict, args.requests), ("version_warm", version_warm, args.requests),
+            ("batch", batch, max(1, args.requests // 10))]
+    if not args.url:
+        # each request is the first for its version; keep it small, every one pays a load
+        plan.insert(1, ("version_cold", version_cold, args.cold_requests))
+    selected = set(args.scenarios.split(",")) if args.scenarios else None
+
+    async def run(client):
+        # touch the warm version once so version_warm really is warm
+        await client.post(f"/predict/{warm_version}", json=payloads[0])
+        for name, make_request, n in plan:
+            if selected is not None and name not in selected:
+                continue
+            concurrency = 1 if name == "version_cold" else args.concurrency
+            rate = 0 if name == "version_cold" else args.rate
+            scenarios[name] = await run_scenario(client, name, make_request, payloads, n, concurrency, rate)
+            s = scenarios[name]
+            print(f"{name:>13} n={n:<6} p50={s['p50_ms']:8.2f}ms p95={s['p95_ms']:8.2f}ms "
+                  f"p99={s['p99_ms']:8.2f}ms {s['throughput_rps']:9.1f} req/s errors={s['error_rate']:.2%}")
+
+    limits = httpx.Limits(max_connections=max(args.concurrency, 100))
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=60, limits=limits) as client:
+            await run(client)
+    else:
+        app = in_process_app(args.model, args.cold_load_ms)
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60,
+                                         limits=limits) as client:
+                await run(client)
+    return scenarios
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=API_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, max_regression):
+    regressed = False
+    print(f"\n{'scenario':>13} {'p95 base':>10} {'p95 now':>10} {'change':>8} {'rps change':>11}")
+    for name, s in current.items():
+        b = baseline.get("scenarios", {}).get(name)
+        if not b:
+            continue
+        change = s["p95_ms"] / b["p95_ms"] - 1 if b["p95_ms"] else 0.0
+        rps = (s["throughput_rps"] or 0) / b["throughput_rps"] - 1 if b.get("throughput_rps") else 0.0
+        flag = "  REGRESSION" if change > max_regression else ""
+        regressed |= bool(flag)
+        print(f"{name:>13} {b['p95_ms']:>10.2f} {s['p95_ms']:>10.2f} {change:>+8.1%} {rps:>+11.1%}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--version", help="version for version_warm (default 2)")
+    parser.add_argument("--model", choices=("rf", "stub"), default="rf")
+    parser.add_argument("--payloads", help="JSONL file of feature dicts to replay")
+    parser.add_argument("--scenarios", help="comma separated subset of predict,version_cold,version_warm,batch")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--cold-requests", type=int, default=20)
+    parser.add_argument("--cold-load-ms", type=float, default=50)
+    parser.add_argument("--batch-rows", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=0, help="requests/sec (open loop); 0 = closed loop")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed p95 increase (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.payloads)
+    scenarios = asyncio.run(bench(args, payloads))
+    result = {
+        "meta": {
+            "timestamp": time.time(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "target": args.url or f"in-process ({args.model})",
+            "args": vars(args),
+        },
+        "scenarios": scenarios,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(scenarios, baseline, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Benchmark the preprocess -> train/evaluate intermediate table formats.
+
+Usage:
+  python scripts/bench_intermediate.py [--rows 1000000] [--repeat 3] [--out results.json]
+
+Writes an Iris-shaped table (4 float features + int target, with noise) with
+pipelines/dag/dataio.py in each format and reports write time, full load time,
+the time to load 2 columns only, and file size. Each load is the best of
+--repeat runs; the OS page cache is warm after the first one.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "pipelines" / "dag"))
+from dataio import read_table, write_table  # noqa: E402
+
+FORMATS = [
+    ("csv", "csv", ""),
+    ("parquet-snappy", "parquet", "snappy"),
+    ("parquet-zstd", "parquet", "zstd"),
+    ("arrow", "arrow", "none"),
+    ("arrow-lz4", "arrow", "lz4"),
+]
+
+
+def make_table(rows, seed=0):
+    from sklearn.datasets import load_iris
+
+    iris = load_iris()
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(iris.data), size=rows)
+    df = pd.DataFrame(iris.data[idx] + rng.normal(0, 0.2, size=(rows, 4)), columns=iris.feature_names)
+    df["target"] = iris.target[idx]
+    return df
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--dir", help="where to write the files (default: a temp dir)")
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args()
+
+    df = make_table(args.rows)
+    projected = [df.columns[0], "target"]
+    workdir = args.dir or tempfile.mkdtemp(prefix="bench_intermediate_")
+    os.makedirs(workdir, exist_ok=True)
+    results = {}
+    print(f"{'format':>15} {'write s':>8} {'load s':>8} {'2 cols s':>9} {'size MiB':>9}")
+    for name, fmt, compression in FORMATS:
+        path = os.path.join(workdir, f"preprocessed.{name}")
+        write_s = best_of(lambda: write_table(df, path, fmt=fmt, compression=compression), 1)
+        load_s = best_of(lambda: read_table(path), args.repeat)
+        cols_s = best_of(lambda: read_table(path, columns=projected), args.repeat)
+        loaded = read_table(path)
+        assert loaded.shape == df.shape and np.allclose(loaded.iloc[:, 0].values, df.iloc[:, 0].values)
+        size = os.path.getsize(path)
+        results[name] = {"write_seconds": write_s, "load_seconds": load_s, "load_2_columns_seconds": cols_s,
+                         "size_bytes": size}
+        print(f"{name:>15} {write_s:>8.3f} {load_s:>8.3f} {cols_s:>9.3f} {size / 2**20:>9.1f}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"rows": args.rows, "formats": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
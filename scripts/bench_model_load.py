@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Benchmark model artifact formats: file size, load time and memory on load.
+
+Usage:
+  python scripts/bench_model_load.py [--trees 200] [--rows 200000] [--repeat 5] [--model model.pkl]
+
+Fits a RandomForest on noisy Iris rows (or takes --model) and writes it as
+  pickle       plain pickle.dump (what mlflow.sklearn stores inside MLmodel)
+  mmap         pipelines/dag/model_io.py MODEL_FORMAT=mmap (uncompressed joblib)
+  compressed   MODEL_FORMAT=compressed (joblib zlib level 3)
+Each load runs in a fresh interpreter; the reported time is the best of
+--repeat and the memory is the growth of peak RSS during the load. The page
+cache is warm after the first load, as it is for a model served from a local
+artifact cache.
+"""
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "pipelines" / "dag"))
+from model_io import save_model  # noqa: E402
+
+_LOADER = r"""
+import json, pickle, resource, sys, time
+sys.path.insert(0, sys.argv[3])
+# import cost is the same for every format; keep it out of the measurement
+import joblib, sklearn.ensemble, model_io
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+t0 = time.perf_counter()
+if sys.argv[2] == "pickle":
+    with open(sys.argv[1], "rb") as f:
+        model = pickle.load(f)
+else:
+    from model_io import load_model
+    model = load_model(sys.argv[1])
+seconds = time.perf_counter() - t0
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"seconds": seconds, "rss_growth_mb": (after - before) / 1024}))
+"""
+
+
+def build_model(trees, rows):
+    from sklearn.datasets import load_iris
+    from sklearn.ensemble import RandomForestClassifier
+
+    iris = load_iris()
+    rng = np.random.default_rng(0)
+    idx = rng.integers(0, len(iris.data), size=rows)
+    X = iris.data[idx] + rng.normal(0, 0.3, size=(rows, iris.data.shape[1]))
+    return RandomForestClassifier(n_estimators=trees, random_state=0, n_jobs=-1).fit(X, iris.target[idx])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", help="existing joblib/pickle model to benchmark instead of a fresh forest")
+    parser.add_argument("--trees", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args()
+
+    if args.model:
+        import joblib
+
+        model = joblib.load(args.model)
+    else:
+        model = build_model(args.trees, args.rows)
+
+    workdir = tempfile.mkdtemp(prefix="bench_model_load_")
+    dag_dir = str(Path(__file__).resolve().parents[1] / "pipelines" / "dag")
+    results = {}
+    print(f"{'format':>11} {'size MiB':>9} {'load s':>8} {'RSS +MiB':>9}")
+    for fmt in ("pickle", "mmap", "compressed"):
+        path = os.path.join(workdir, f"model.{fmt}")
+        if fmt == "pickle":
+            with open(path, "wb") as f:
+                pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+        else:
+            save_model(model, path, fmt=fmt)
+        runs = [json.loads(subprocess.check_output([sys.executable, "-c", _LOADER, path, fmt, dag_dir], text=True))
+                for _ in range(args.repeat)]
+        best = min(runs, key=lambda r: r["seconds"])
+        results[fmt] = {"size_bytes": os.path.getsize(path), "load_seconds": best["seconds"],
+                        "rss_growth_mb": best["rss_growth_mb"]}
+        r = results[fmt]
+        print(f"{fmt:>11} {r['size_bytes'] / 2**20:>9.1f} {r['load_seconds']:>8.3f} {r['rss_growth_mb']:>9.1f}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"trees": args.trees, "rows": args.rows, "formats": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Benchmark the compiled tree engine (api/tree_engine.py) against mlflow pyfunc and raw sklearn.
+
+Usage:
+  python scripts/bench_tree_engine.py [--model-uri models:/argo-dag-demo/15] [--trees 100]
+
+Without --model-uri a RandomForestClassifier is trained on Iris (like
+pipelines/dag/train.py) and saved as a local MLflow model, so no tracking
+server is needed. Predictions of all three paths are checked to be identical.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import mlflow.pyfunc
+import mlflow.sklearn
+import numpy as np
+import pandas as pd
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "api"))
+from tree_engine import compile_model, unwrap_sklearn  # noqa: E402
+
+
+def timeit(fn, repeat):
+    fn()  # warm up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model-uri", help="MLflow model uri to benchmark instead of a local Iris forest")
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--batch-sizes", default="1,32,1024,16384")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    iris = load_iris(as_frame=True)
+    if args.model_uri:
+        pyfunc_model = mlflow.pyfunc.load_model(args.model_uri)
+    else:
+        rf = RandomForestClassifier(n_estimators=args.trees, random_state=0).fit(iris.data, iris.target)
+        tmpdir = tempfile.mkdtemp(prefix="bench_tree_engine_")
+        mlflow.sklearn.save_model(rf, f"{tmpdir}/model", input_example=iris.data.iloc[:2],
+                                  serialization_format=mlflow.sklearn.SERIALIZATION_FORMAT_CLOUDPICKLE)
+        pyfunc_model = mlflow.pyfunc.load_model(f"{tmpdir}/model")
+
+    raw = unwrap_sklearn(pyfunc_model)
+    fast = compile_model(pyfunc_model)
+    if fast is None:
+        print(f"{type(raw).__name__} is not supported by the compiled tree engine")
+        sys.exit(2)
+
+    rng = np.random.default_rng(0)
+    print(f"model={type(raw).__name__} trees={fast.forest.roots.size} nodes={fast.forest.feature.size}")
+    print(f"{'batch':>7} {'pyfunc ms':>10} {'sklearn ms':>11} {'compiled ms':>12} {'speedup':>8}")
+    for batch in (int(b) for b in args.batch_sizes.split(",")):
+        idx = rng.integers(0, len(iris.data), size=batch)
+        noise = rng.normal(0, 0.3, size=(batch, iris.data.shape[1]))
+        df = pd.DataFrame(iris.data.values[idx] + noise, columns=iris.data.columns)
+
+        expected = np.asarray(pyfunc_model.predict(df))
+        if not (np.array_equal(expected, raw.predict(df)) and np.array_equal(expected, fast.predict(df))):
+            print(f"prediction mismatch at batch size {batch}")
+            sys.exit(1)
+
+        repeat = max(1, args.repeat if batch <= 1024 else args.repeat // 5)
+        t_pyfunc = timeit(lambda: pyfunc_model.predict(df), repeat)
+        t_raw = timeit(lambda: raw.predict(df), repeat)
+        t_fast = timeit(lambda: fast.predict(df), repeat)
+        print(f"{batch:>7} {t_pyfunc * 1e3:>10.3f} {t_raw * 1e3:>11.3f} {t_fast * 1e3:>12.3f} "
+              f"{t_pyfunc / t_fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
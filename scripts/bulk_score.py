@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Offline bulk scoring of a CSV, JSONL, Parquet or Arrow file with a registered model.
+
+Usage:
+  python scripts/bulk_score.py --version 15 /inputs/preprocessed.parquet predictions.csv
+  python scripts/bulk_score.py --model-uri models:/argo-dag-demo/15 rows.jsonl out.jsonl --workers 4
+
+The model artifacts are downloaded once, then each worker process loads the
+model a single time in its initializer. The input is read in --chunk-size row
+chunks and never held in memory as a whole: at most 2 * --workers chunks are in
+flight, and results are written in input order as soon as the next one is ready.
+Parquet and Arrow inputs (the preprocess step's intermediate table) are read
+batch by batch with pipelines/dag/dataio.py. Input columns not in the model
+signature (e.g. `target`) are ignored unless --include-input is given, in which
+case they are copied to the output.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "pipelines" / "dag"))
+import dataio  # noqa: E402
+
+DEFAULT_MODEL_NAME = "argo-dag-demo"
+
+_model = None
+_columns = None
+
+
+def _load_local_model(local_path):
+    """MLmodel directories via pyfunc, otherwise the first pickle found (like the API fallback)."""
+    if os.path.exists(os.path.join(local_path, "MLmodel")):
+        import mlflow.pyfunc
+
+        return mlflow.pyfunc.load_model(local_path)
+    from model_io import load_model
+
+    for root, _, files in os.walk(local_path):
+        for f in sorted(files):
+            if f.endswith((".pkl", ".joblib")):
+                # uncompressed joblib files are memory-mapped, compressed ones read fully
+                return load_model(os.path.join(root, f))
+    raise FileNotFoundError(f"no MLmodel or pickle found under {local_path}")
+
+
+def _input_columns(model):
+    """Model input columns: the MLmodel signature, else the estimator's `feature_names_in_`.
+
+    evaluate.py logs models without a signature, so for those the columns come
+    from the sklearn model inside the pyfunc wrapper (like api/tree_engine.py).
+    """
+    metadata = getattr(model, "metadata", None)
+    if metadata is not None:
+        schema = metadata.get_input_schema()
+        if schema is not None and schema.has_input_names():
+            return schema.input_names()
+    get_raw = getattr(model, "get_raw_model", None)
+    if get_raw is not None:
+        try:
+            model = get_raw()
+        except Exception:
+            pass
+    names = getattr(model, "feature_names_in_", None)
+    return list(names) if names is not None else None
+
+
+def _init_worker(local_path):
+    global _model, _columns
+    _model = _load_local_model(local_path)
+    _columns = _input_columns(_model)
+
+
+def _score_chunk(df):
+    X = df[_columns] if _columns is not None else df
+    return [p.item() if hasattr(p, "item") else p for p in _model.predict(X)]
+
+
+def iter_chunks(path, chunk_size, fmt):
+    if fmt in ("parquet", "arrow"):
+        yield from dataio.iter_chunks(path, chunk_size)
+    elif fmt == "csv":
+        yield from pd.read_csv(path, chunksize=chunk_size)
+    else:
+        with pd.read_json(path, lines=True, chunksize=chunk_size) as reader:
+            yield from reader
+
+
+class _Writer:
+    def __init__(self, path, fmt, include_input):
+        self.fmt = fmt
+        self.include_input = include_input
+        self.f = open(path, "w", newline="")
+        self.header = True
+
+    def write(self, df, preds):
+        out = df.copy() if self.include_input else pd.DataFrame(index=df.index)
+        out["prediction"] = preds
+        if self.fmt == "csv":
+            out.to_csv(self.f, index=False, header=self.header)
+            self.header = False
+        else:
+            for rec in out.to_dict(orient="records"):
+                self.f.write(json.dumps(rec, default=str) + "\n")
+
+    def close(self):
+        self.f.close()
+
+
+def _format_of(path, override):
+    if override:
+        return override
+    return "jsonl" if path.endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+def _input_format_of(path, override):
+    if override:
+        return override
+    # Parquet / Arrow are recognised by their magic bytes, whatever the file is called
+    fmt = dataio.table_format(path) if os.path.isfile(path) else "csv"
+    return fmt if fmt != "csv" else _format_of(path, None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input")
+    parser.add_argument("output")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--version", help=f"version of models:/{DEFAULT_MODEL_NAME}")
+    group.add_argument("--model-uri", help="any MLflow model uri (models:/, runs:/, local path)")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="scoring processes; 0 scores in this process")
+    parser.add_argument("--input-format", choices=("csv", "jsonl", "parquet", "arrow"))
+    parser.add_argument("--output-format", choices=("csv", "jsonl"))
+    parser.add_argument("--include-input", action="store_true", help="copy input columns to the output")
+    args = parser.parse_args()
+
+    model_uri = args.model_uri or f"models:/{DEFAULT_MODEL_NAME}/{args.version}"
+    in_fmt = _input_format_of(args.input, args.input_format)
+    out_fmt = _format_of(args.output, args.output_format)
+
+    started = time.perf_counter()
+    if os.path.isdir(model_uri):
+        local_path = model_uri
+    else:
+        import mlflow.artifacts
+
+        local_path = mlflow.artifacts.download_artifacts(artifact_uri=model_uri,
+                                                         dst_path=tempfile.mkdtemp(prefix="bulk_score_"))
+    print(f"model {model_uri} fetched in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    writer = _Writer(args.output, out_fmt, args.include_input)
+    rows = 0
+    started = time.perf_counter()
+    try:
+        chunks = iter_chunks(args.input, args.chunk_size, in_fmt)
+        if args.workers <= 0:
+            _init_worker(local_path)
+            for df in chunks:
+                writer.write(df, _score_chunk(df))
+                rows += len(df)
+        else:
+            with ProcessPoolExecutor(args.workers, initializer=_init_worker, initargs=(local_path,)) as pool:
+                # bounded window of in-flight chunks: keeps memory flat and output ordered
+                pending = deque()
+                for df in chunks:
+                    pending.append((df, pool.submit(_score_chunk, df)))
+                    if len(pending) >= 2 * args.workers:
+                        done_df, fut = pending.popleft()
+                        writer.write(done_df, fut.result())
+                        rows += len(done_df)
+                while pending:
+                    done_df, fut = pending.popleft()
+                    writer.write(done_df, fut.result())
+                    rows += len(done_df)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    print(json.dumps({
+        "model_uri": model_uri,
+        "rows": rows,
+        "workers": args.workers,
+        "chunk_size": args.chunk_size,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(rows / elapsed, 1) if elapsed > 0 else None,
+    }))
+
+
+if __name__ == "__main__":
+    main()
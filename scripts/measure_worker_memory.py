@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Measure per-worker memory of api/serve.py with and without fork-after-load.
+
+Usage:
+  python scripts/measure_worker_memory.py [--workers 1,2,4] [--trees 200] [--json out.json]
+
+A RandomForest large enough to dominate memory is trained and saved as a local
+MLflow model, then `api/serve.py --workers N` is started in both preload
+(fork after loading) and --no-preload (every worker loads its own copy) modes.
+After some /predict traffic, RSS, PSS and USS of the parent and every worker
+are read with psutil (Linux). PSS splits shared pages between the processes
+that map them, so the sum of PSS is the real footprint. With preload it should
+grow far slower than N x the single-process size.
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+import mlflow.sklearn
+import numpy as np
+import pandas as pd
+import psutil
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+
+SERVE = Path(__file__).resolve().parents[1] / "api" / "serve.py"
+MB = 1024 * 1024
+
+
+def build_model(trees: int, dst: str):
+    X, y = make_classification(n_samples=20000, n_features=20, n_informative=10, n_classes=3, random_state=0)
+    X = pd.DataFrame(X, columns=[f"f{i}" for i in range(X.shape[1])])
+    rf = RandomForestClassifier(n_estimators=trees, random_state=0, n_jobs=-1).fit(X, y)
+    mlflow.sklearn.save_model(rf, dst, input_example=X.iloc[:2],
+                              serialization_format=mlflow.sklearn.SERIALIZATION_FORMAT_CLOUDPICKLE)
+    return list(X.columns)
+
+
+def _get(url, timeout=2):
+    with urllib.request.urlopen(url, timeout=timeout) as r:
+        return json.loads(r.read())
+
+
+def _post(url, payload):
+    req = urllib.request.Request(url, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=10) as r:
+        return r.status
+
+
+def measure(model_dir, columns, workers, preload, port, n_requests, startup_timeout):
+    env = dict(os.environ, DEFAULT_MODEL_URI=model_dir, ARTIFACT_CACHE_DIR="", LOG_LEVEL="WARNING",
+               PROMETHEUS_MULTIPROC_DIR=tempfile.mkdtemp(prefix="prom-"))
+    cmd = [sys.executable, str(SERVE), "--workers", str(workers), "--host", "127.0.0.1", "--port", str(port)]
+    if not preload:
+        cmd.append("--no-preload")
+    proc = subprocess.Popen(cmd, cwd=SERVE.parent, env=env)
+    try:
+        base = f"http://127.0.0.1:{port}"
+        deadline = time.time() + startup_timeout
+        parent = psutil.Process(proc.pid)
+        # every worker must have loaded (or inherited) the model before measuring
+        while True:
+            if proc.poll() is not None or time.time() > deadline:
+                raise RuntimeError(f"server did not become ready (workers={workers}, preload={preload})")
+            try:
+                if _get(f"{base}/health").get("model_loaded") and len(parent.children()) == workers:
+                    break
+            except OSError:
+                pass
+            time.sleep(0.5)
+
+        rng = np.random.default_rng(0)
+        for _ in range(n_requests):
+            _post(f"{base}/predict", dict(zip(columns, rng.normal(size=len(columns)).tolist())))
+        if not preload:
+            # requests are spread over workers; give late loaders time to finish
+            time.sleep(2)
+
+        def info(p, role):
+            m = p.memory_full_info()
+            return {"role": role, "pid": p.pid, "rss_mb": m.rss / MB, "pss_mb": m.pss / MB, "uss_mb": m.uss / MB}
+
+        procs = [info(parent, "parent")] + [info(c, "worker") for c in parent.children()]
+        return {
+            "workers": workers,
+            "preload": preload,
+            "processes": procs,
+            "total_pss_mb": sum(p["pss_mb"] for p in procs),
+            "total_rss_mb": sum(p["rss_mb"] for p in procs),
+        }
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(15)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--trees", type=int, default=200)
+    parser.add_argument("--port", type=int, default=18000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--startup-timeout", type=float, default=180)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    model_dir = os.path.join(tempfile.mkdtemp(prefix="measure_worker_memory_"), "model")
+    columns = build_model(args.trees, model_dir)
+    print(f"model: {args.trees} trees, {sum(f.stat().st_size for f in Path(model_dir).rglob('*')) / MB:.1f} MB on disk")
+
+    results = []
+    print(f"{'workers':>7} {'mode':>10} {'total PSS MB':>13} {'total RSS MB':>13} {'worker USS MB':>14}")
+    for i, workers in enumerate(int(w) for w in args.workers.split(",")):
+        for preload in (True, False):
+            r = measure(model_dir, columns, workers, preload, args.port + 2 * i + int(preload),
+                        args.requests, args.startup_timeout)
+            results.append(r)
+            uss = [p["uss_mb"] for p in r["processes"] if p["role"] == "worker"]
+            print(f"{workers:>7} {'preload' if preload else 'per-worker':>10} {r['total_pss_mb']:>13.1f} "
+                  f"{r['total_rss_mb']:>13.1f} {sum(uss) / len(uss):>14.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
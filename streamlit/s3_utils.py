@@ -1,15 +1,49 @@
+import hashlib
+import io
+import json
 import os
+import shutil
 import tempfile
 import tarfile
+import threading
+import time
 import boto3
 import logging
-from typing import Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+from botocore.config import Config
 import mlflow.pyfunc
 import pickle
 import joblib
 
 logger = logging.getLogger(__name__)
 
+# Streaming download: the object is fetched as concurrent ranged GETs and the
+# gzip stream is piped straight into tar extraction (no model.tgz on disk).
+# Memory use is bounded by 2 * S3_DOWNLOAD_THREADS * S3_DOWNLOAD_PART_SIZE.
+STREAMING_DOWNLOAD = os.environ.get("S3_STREAMING_DOWNLOAD", "true").lower() in ("1", "true", "yes")
+DOWNLOAD_PART_SIZE = int(os.environ.get("S3_DOWNLOAD_PART_SIZE", str(8 * 1024 * 1024)))
+DOWNLOAD_THREADS = int(os.environ.get("S3_DOWNLOAD_THREADS", "4"))
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Extracted artifacts are kept under S3_ARTIFACT_CACHE_DIR together with the
+# ETag/size/last-modified of the object they came from. A HEAD request decides
+# whether the previous extraction can be reused. Empty string disables the cache.
+ARTIFACT_CACHE_DIR = os.environ.get(
+    "S3_ARTIFACT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "s3-artifact-cache"))
+_MANIFEST_FILE = "manifest.json"
+
+# joblib mmap_mode ("r") for uncompressed model files; the arrays are paged in from the
+# (cached) extracted file instead of being read and copied. Off by default, as in the API.
+MODEL_MMAP_MODE = os.environ.get("MODEL_MMAP_MODE", "") or None
+
+# boto3 clients are thread-safe; one per endpoint/credential pair is reused
+# across calls instead of building a new session and client every time
+_clients: Dict[Tuple[Optional[str], Optional[str], Optional[str]], Any] = {}
+_clients_lock = threading.Lock()
+
 
 def parse_artifact_uri(uri: str):
     """Parse artifact URI produced by Argo/MLflow examples.
@@ -40,32 +74,138 @@ def parse_artifact_uri(uri: str):
         raise ValueError(f"Unsupported artifact URI format: {uri}")
 
 
-def download_and_extract_model(artifact_uri: str,
-                               aws_access_key_id: Optional[str] = None,
-                               aws_secret_access_key: Optional[str] = None) -> str:
-    """Download model artifact (tar.gz) from S3/MinIO and extract to a temp dir.
+def get_s3_client(endpoint_url: Optional[str] = None,
+                  aws_access_key_id: Optional[str] = None,
+                  aws_secret_access_key: Optional[str] = None):
+    """Return a pooled S3 client for this endpoint/credential pair."""
+    key = (endpoint_url, aws_access_key_id, aws_secret_access_key)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            session_kwargs = {}
+            if aws_access_key_id is not None:
+                session_kwargs["aws_access_key_id"] = aws_access_key_id
+            if aws_secret_access_key is not None:
+                session_kwargs["aws_secret_access_key"] = aws_secret_access_key
+            session = boto3.session.Session(**session_kwargs)
 
-    Returns path to the extracted model directory (first top-level dir if present, else the temp dir).
+            client_kwargs = {"config": Config(max_pool_connections=max(10, DOWNLOAD_THREADS * 2))}
+            if endpoint_url:
+                client_kwargs["endpoint_url"] = endpoint_url
+            client = session.client("s3", **client_kwargs)
+            _clients[key] = client
+        return client
+
+
+class RangedObjectReader(io.RawIOBase):
+    """Sequential, read-only file object over an S3 object fetched as parallel ranged GETs.
+
+    Up to `2 * threads` parts are requested ahead of the reader and handed out
+    strictly in order, so it can be fed to `tarfile.open(mode="r|gz")`. Every
+    part is requested with the ETag from the HEAD request, so an object that is
+    overwritten mid-download fails instead of producing a mixed stream.
     """
-    info = parse_artifact_uri(artifact_uri)
-    endpoint_url = info.get("endpoint_url")
-    bucket = info["bucket"]
-    key = info["key"]
 
-    session_kwargs = {}
-    if aws_access_key_id is not None:
-        session_kwargs["aws_access_key_id"] = aws_access_key_id
-    if aws_secret_access_key is not None:
-        session_kwargs["aws_secret_access_key"] = aws_secret_access_key
+    def __init__(self, s3, bucket: str, key: str, size: int, etag: Optional[str] = None,
+                 part_size: int = DOWNLOAD_PART_SIZE, threads: int = DOWNLOAD_THREADS):
+        super().__init__()
+        self._s3 = s3
+        self._bucket = bucket
+        self._key = key
+        self._size = size
+        self._etag = etag
+        self._part_size = max(1, part_size)
+        self._starts = iter(range(0, size, self._part_size))
+        self._pool = ThreadPoolExecutor(max(1, threads), thread_name_prefix="s3-range")
+        self._pending: deque = deque()
+        self._buf = memoryview(b"")
+        for _ in range(2 * max(1, threads)):
+            self._schedule()
+
+    def _schedule(self):
+        start = next(self._starts, None)
+        if start is not None:
+            end = min(start + self._part_size, self._size) - 1
+            self._pending.append(self._pool.submit(self._get_range, start, end))
+
+    def _get_range(self, start: int, end: int) -> bytes:
+        kwargs = {"Bucket": self._bucket, "Key": self._key, "Range": f"bytes={start}-{end}"}
+        if self._etag:
+            kwargs["IfMatch"] = self._etag
+        data = self._s3.get_object(**kwargs)["Body"].read()
+        if len(data) != end - start + 1:
+            raise IOError(f"short read for bytes {start}-{end} of s3://{self._bucket}/{self._key}")
+        return data
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buf:
+            if not self._pending:
+                return 0
+            self._buf = memoryview(self._pending.popleft().result())
+            self._schedule()
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
 
-    session = boto3.session.Session(**session_kwargs)
-    client_kwargs = {}
-    if endpoint_url:
-        client_kwargs["endpoint_url"] = endpoint_url
+    def close(self):
+        if not self.closed:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pending.clear()
+        super().close()
 
-    s3 = session.client("s3", **client_kwargs)
 
-    tmpdir = tempfile.mkdtemp(prefix="mlflow_artifact_")
+def _safe_extract(tar: tarfile.TarFile, path: str):
+    # reject absolute paths / .. members where the running Python supports it
+    if hasattr(tarfile, "data_filter"):
+        tar.extractall(path=path, filter="data")
+    else:
+        tar.extractall(path=path)
+
+
+def _extracted_root(tmpdir: str, ignore: Optional[str] = None) -> str:
+    """First top-level dir if the archive had exactly one, else the temp dir itself."""
+    entries = [e for e in os.listdir(tmpdir) if e != ignore]
+    if len(entries) == 1 and os.path.isdir(os.path.join(tmpdir, entries[0])):
+        return os.path.join(tmpdir, entries[0])
+    return tmpdir
+
+
+def _stream_download_and_extract(s3, bucket: str, key: str, tmpdir: str,
+                                 part_size: int, threads: int, head: Optional[dict] = None) -> str:
+    if head is None:
+        head = s3.head_object(Bucket=bucket, Key=key)
+    size = head["ContentLength"]
+    etag = head.get("ETag")
+
+    logger.info("Streaming s3://%s/%s (%d bytes, part_size=%d, threads=%d) into %s",
+                bucket, key, size, part_size, threads, tmpdir)
+    with io.BufferedReader(RangedObjectReader(s3, bucket, key, size, etag, part_size, threads),
+                           buffer_size=1024 * 1024) as stream:
+        if stream.peek(len(GZIP_MAGIC))[:len(GZIP_MAGIC)] != GZIP_MAGIC:
+            # not a tar.gz; keep the object as-is, like the non-streaming path
+            logger.warning("Object is not a gzip archive: s3://%s/%s", bucket, key)
+            name = os.path.basename(key) or "model.tgz"
+            with open(os.path.join(tmpdir, name), "wb") as f:
+                while True:
+                    chunk = stream.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+            return _extracted_root(tmpdir, ignore=name)
+        with tarfile.open(fileobj=stream, mode="r|gz") as tar:
+            _safe_extract(tar, tmpdir)
+    return _extracted_root(tmpdir)
+
+
+def _download_into(s3, bucket: str, key: str, tmpdir: str, streaming: bool,
+                   part_size: int, threads: int, head: Optional[dict] = None) -> str:
+    if streaming:
+        return _stream_download_and_extract(s3, bucket, key, tmpdir, part_size, threads, head)
+
     tar_path = os.path.join(tmpdir, "model.tgz")
 
     logger.info("Downloading s3://%s/%s to %s", bucket, key, tar_path)
@@ -75,16 +215,173 @@ def download_and_extract_model(artifact_uri: str,
     # try to extract
     try:
         with tarfile.open(tar_path, "r:gz") as tar:
-            tar.extractall(path=tmpdir)
+            _safe_extract(tar, tmpdir)
     except tarfile.ReadError:
         # not a tar.gz; if it's a raw folder or model file, just return path
         logger.warning("Downloaded file is not a tar.gz archive: %s", tar_path)
 
     # find top-level extracted directory (ignore the tar file)
-    entries = [e for e in os.listdir(tmpdir) if e != os.path.basename(tar_path)]
-    if len(entries) == 1 and os.path.isdir(os.path.join(tmpdir, entries[0])):
-        return os.path.join(tmpdir, entries[0])
-    return tmpdir
+    return _extracted_root(tmpdir, ignore=os.path.basename(tar_path))
+
+
+def _cache_entry_dir(endpoint_url: Optional[str], bucket: str, key: str) -> str:
+    digest = hashlib.sha256(f"{endpoint_url or ''}|{bucket}|{key}".encode("utf-8")).hexdigest()
+    return os.path.join(ARTIFACT_CACHE_DIR, digest)
+
+
+def _object_validators(head: dict) -> dict:
+    last_modified = head.get("LastModified")
+    if last_modified is not None and hasattr(last_modified, "isoformat"):
+        last_modified = last_modified.isoformat()
+    return {
+        "etag": head.get("ETag"),
+        "size": head.get("ContentLength"),
+        "last_modified": last_modified,
+    }
+
+
+def _file_manifest(root: str) -> dict:
+    """Relative path -> size of every extracted file."""
+    files = {}
+    for dirpath, _, names in os.walk(root):
+        for name in names:
+            full = os.path.join(dirpath, name)
+            rel = os.path.relpath(full, root)
+            if rel != _MANIFEST_FILE:
+                files[rel] = os.path.getsize(full)
+    return files
+
+
+def _cached_path(entry: str, validators: Optional[dict] = None) -> Optional[str]:
+    """Extracted path of an intact cache entry (matching `validators` if given), else None."""
+    try:
+        with open(os.path.join(entry, _MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if validators is not None:
+        if any(manifest.get(k) != v for k, v in validators.items()):
+            logger.info("Cached extraction in %s is stale (object changed)", entry)
+            return None
+    # a missing or truncated file means the extraction was damaged after the fact
+    for rel, size in manifest.get("files", {}).items():
+        try:
+            if os.path.getsize(os.path.join(entry, rel)) != size:
+                raise OSError(f"size mismatch for {rel}")
+        except OSError:
+            logger.warning("Cached extraction in %s is corrupt (%s); downloading again", entry, rel)
+            return None
+    return os.path.normpath(os.path.join(entry, manifest["path"]))
+
+
+def _remove_stale_tmp(max_age: float = 3600):
+    """Remove temp dirs left behind by interrupted downloads."""
+    now = time.time()
+    for name in os.listdir(ARTIFACT_CACHE_DIR):
+        path = os.path.join(ARTIFACT_CACHE_DIR, name)
+        try:
+            if name.startswith(".tmp-") and now - os.path.getmtime(path) > max_age:
+                shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            pass
+
+
+def _replace_entry(tmpdir: str, entry: str):
+    """Move a finished extraction into place, replacing any previous one."""
+    if os.path.exists(entry):
+        trash = tempfile.mkdtemp(prefix=".tmp-", dir=ARTIFACT_CACHE_DIR)
+        try:
+            os.rename(entry, os.path.join(trash, "old"))
+        except OSError:
+            pass
+        shutil.rmtree(trash, ignore_errors=True)
+    try:
+        os.rename(tmpdir, entry)
+    except OSError:
+        # another process finished the same object first; keep theirs
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def download_and_extract_model(artifact_uri: str,
+                               aws_access_key_id: Optional[str] = None,
+                               aws_secret_access_key: Optional[str] = None,
+                               streaming: Optional[bool] = None,
+                               part_size: Optional[int] = None,
+                               threads: Optional[int] = None) -> str:
+    """Download model artifact (tar.gz) from S3/MinIO and extract to a temp dir.
+
+    By default the archive is streamed (parallel ranged GETs piped into tar);
+    pass `streaming=False` or set S3_STREAMING_DOWNLOAD=false for the old
+    download-then-extract behaviour.
+
+    With S3_ARTIFACT_CACHE_DIR set (the default), the object is only downloaded
+    when its ETag/size/last-modified differ from the previous extraction or that
+    extraction is incomplete; otherwise the cached directory is returned after a
+    single HEAD request. If the HEAD fails, an intact cached copy is used.
+
+    Returns path to the extracted model directory (first top-level dir if present, else the temp dir).
+    """
+    info = parse_artifact_uri(artifact_uri)
+    endpoint_url = info.get("endpoint_url")
+    bucket = info["bucket"]
+    key = info["key"]
+
+    s3 = get_s3_client(endpoint_url, aws_access_key_id, aws_secret_access_key)
+    streaming = STREAMING_DOWNLOAD if streaming is None else streaming
+    part_size = part_size or DOWNLOAD_PART_SIZE
+    threads = threads or DOWNLOAD_THREADS
+
+    if not ARTIFACT_CACHE_DIR:
+        tmpdir = tempfile.mkdtemp(prefix="mlflow_artifact_")
+        return _download_into(s3, bucket, key, tmpdir, streaming, part_size, threads)
+
+    entry = _cache_entry_dir(endpoint_url, bucket, key)
+    try:
+        head = s3.head_object(Bucket=bucket, Key=key)
+    except Exception:
+        path = _cached_path(entry)
+        if path is None:
+            raise
+        logger.warning("HEAD s3://%s/%s failed; using cached extraction %s", bucket, key, path, exc_info=True)
+        return path
+
+    validators = _object_validators(head)
+    path = _cached_path(entry, validators)
+    if path is not None:
+        logger.info("Reusing cached extraction of s3://%s/%s (ETag %s)", bucket, key, validators["etag"])
+        return path
+
+    os.makedirs(ARTIFACT_CACHE_DIR, exist_ok=True)
+    _remove_stale_tmp()
+    tmpdir = tempfile.mkdtemp(prefix=".tmp-", dir=ARTIFACT_CACHE_DIR)
+    try:
+        local_path = _download_into(s3, bucket, key, tmpdir, streaming, part_size, threads, head)
+        manifest = dict(validators, uri=artifact_uri, created=time.time(),
+                        path=os.path.relpath(local_path, tmpdir), files=_file_manifest(tmpdir))
+        # the manifest is written last: an entry without one is never reused
+        with open(os.path.join(tmpdir, _MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f)
+        _replace_entry(tmpdir, entry)
+    except Exception:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+        raise
+
+    path = _cached_path(entry, validators)
+    if path is None:
+        raise RuntimeError(f"cached extraction of s3://{bucket}/{key} is not usable")
+    return path
+
+
+def _joblib_load(path: str):
+    """joblib.load with the arrays of uncompressed files memory-mapped (MODEL_MMAP_MODE).
+
+    Compressed files (zlib/gzip/... , e.g. MODEL_FORMAT=compressed from the
+    pipeline) cannot be mapped and are decompressed into memory.
+    """
+    # uncompressed joblib/pickle starts with the pickle PROTO opcode 0x80, compressed with a zlib/gzip/lz4 header
+    with open(path, "rb") as f:
+        compressed = f.read(1) != b"\x80"
+    return joblib.load(path, mmap_mode=None if compressed else MODEL_MMAP_MODE)
 
 
 def load_model_from_path(path: str):
@@ -110,7 +407,7 @@ def load_model_from_path(path: str):
         if os.path.exists(p):
             # try joblib first for .joblib/.pkl
             try:
-                return joblib.load(p)
+                return _joblib_load(p)
             except Exception:
                 with open(p, "rb") as f:
                     return pickle.load(f)
@@ -118,7 +415,7 @@ def load_model_from_path(path: str):
     # last resort: if path itself is a .pkl
     if path.endswith(".pkl") or path.endswith(".joblib"):
         try:
-            return joblib.load(path)
+            return _joblib_load(path)
         except Exception:
             with open(path, "rb") as f:
                 return pickle.load(f)
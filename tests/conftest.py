@@ -0,0 +1,21 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+# api/ and pipelines/dag/ import their sibling modules flat, as in their Docker images
+for path in (REPO_ROOT / "api", REPO_ROOT / "pipelines" / "dag"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+
+@pytest.fixture(scope="session")
+def s3_utils():
+    """streamlit/s3_utils.py loaded by path; the directory name collides with the streamlit package."""
+    spec = importlib.util.spec_from_file_location("local_s3_utils", REPO_ROOT / "streamlit" / "s3_utils.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
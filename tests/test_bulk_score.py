@@ -0,0 +1,36 @@
+import csv
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from sklearn.datasets import load_iris
+from sklearn.ensemble import RandomForestClassifier
+
+from dataio import write_table
+
+BULK_SCORE = Path(__file__).resolve().parents[1] / "scripts" / "bulk_score.py"
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_scores_signature_less_model_on_preprocessed_table(tmp_path, workers):
+    mlflow_sklearn = pytest.importorskip("mlflow.sklearn")
+    iris = load_iris(as_frame=True)
+    df = iris.frame
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(iris.data, iris.target)
+    # the way evaluate.py logs it: sklearn flavor, no signature (pickled, so it loads without
+    # the skops trust list newer MLflow versions ask for)
+    mlflow_sklearn.save_model(model, str(tmp_path / "model"),
+                              serialization_format=mlflow_sklearn.SERIALIZATION_FORMAT_CLOUDPICKLE)
+    write_table(df, str(tmp_path / "preprocessed.parquet"))
+
+    out = tmp_path / "predictions.csv"
+    subprocess.run([sys.executable, str(BULK_SCORE), "--model-uri", str(tmp_path / "model"),
+                    str(tmp_path / "preprocessed.parquet"), str(out), "--workers", str(workers),
+                    "--chunk-size", "64"], check=True, capture_output=True)
+
+    with open(out) as f:
+        predictions = [int(row["prediction"]) for row in csv.DictReader(f)]
+    assert predictions == model.predict(df.drop(columns="target")).tolist()
+    assert list(pd.read_csv(out).columns) == ["prediction"]
@@ -0,0 +1,24 @@
+import time
+
+from loader import ModelLoader
+
+
+def _failing_load(uri):
+    raise RuntimeError(f"cannot load {uri}")
+
+
+def test_failed_loads_expire_and_are_capped():
+    loader = ModelLoader(_failing_load, failure_cooldown_seconds=0.2, max_failed=3)
+    for i in range(5):
+        fut = loader.load(f"models:/m/{i}")
+        assert fut.exception(timeout=5) is not None
+    deadline = time.monotonic() + 5
+    while loader.in_flight() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert loader.cooling_down() == ["models:/m/2", "models:/m/3", "models:/m/4"]
+    assert loader.load("models:/m/4") is fut
+
+    time.sleep(0.3)
+    assert loader.cooling_down() == []
+    assert loader._failed == {}
+    loader.shutdown()
@@ -0,0 +1,102 @@
+import threading
+
+import pytest
+import requests
+
+pytest.importorskip("mlflow")
+from mlflow.exceptions import MlflowException  # noqa: E402
+from mlflow.protos.databricks_pb2 import INVALID_PARAMETER_VALUE, TEMPORARILY_UNAVAILABLE  # noqa: E402
+
+from mlflow_batch import _MAX_ENTITIES, _MAX_METRICS, _MAX_PARAMS, BatchLogger  # noqa: E402
+
+
+class FakeClient:
+    """Records log_batch calls; raises the queued errors first."""
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def log_batch(self, run_id, metrics, params, tags):
+        with self.lock:
+            if self.errors:
+                raise self.errors.pop(0)
+            self.batches.append((run_id, list(metrics), list(params), list(tags)))
+
+    def logged(self, kind):
+        index = {"metrics": 1, "params": 2, "tags": 3}[kind]
+        return [e for batch in self.batches for e in batch[index]]
+
+
+def test_flush_sends_everything_in_batches_within_limits():
+    client = FakeClient()
+    ml = BatchLogger("run", client=client, flush_interval=60)
+    ml.log_metrics({f"m{i}": i for i in range(2500)})
+    ml.log_params({f"p{i}": i for i in range(150)})
+    ml.set_tags({"stage": "evaluate"})
+    assert ml.flush(timeout=10)
+    ml.close()
+
+    assert len(client.logged("metrics")) == 2500
+    assert {p.key: p.value for p in client.logged("params")} == {f"p{i}": str(i) for i in range(150)}
+    assert [t.key for t in client.logged("tags")] == ["stage"]
+    for _, metrics, params, tags in client.batches:
+        assert len(metrics) <= _MAX_METRICS and len(params) <= _MAX_PARAMS
+        assert len(metrics) + len(params) + len(tags) <= _MAX_ENTITIES
+
+
+def test_close_flushes_pending_entries():
+    client = FakeClient()
+    with BatchLogger("run", client=client, flush_interval=60) as ml:
+        ml.log_metric("accuracy", 0.9, step=3)
+    [metric] = client.logged("metrics")
+    assert (metric.key, metric.value, metric.step) == ("accuracy", 0.9, 3)
+
+
+@pytest.mark.parametrize("error", [
+    requests.exceptions.ConnectionError("connection refused"),
+    requests.exceptions.Timeout("read timed out"),
+    ConnectionResetError("connection reset by peer"),
+    MlflowException("busy", error_code=TEMPORARILY_UNAVAILABLE),
+])
+def test_transient_errors_are_retried(error):
+    client = FakeClient(errors=[error, error])
+    ml = BatchLogger("run", client=client, backoff=0.01)
+    ml.log_metric("loss", 0.1)
+    assert ml.flush(timeout=10)
+    ml.close()
+    assert len(client.logged("metrics")) == 1
+    assert (ml.batches_sent, ml.failed_batches) == (1, 0)
+
+
+def test_batch_is_dropped_after_max_retries():
+    client = FakeClient(errors=[requests.exceptions.ConnectionError("down")] * 3)
+    ml = BatchLogger("run", client=client, max_retries=2, backoff=0.01)
+    ml.log_metric("loss", 0.1)
+    assert ml.flush(timeout=10)
+    ml.close()
+    assert client.batches == []
+    assert ml.failed_batches == 1
+
+
+def _http_error(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    return requests.exceptions.HTTPError(f"{status_code} Client Error", response=response)
+
+
+@pytest.mark.parametrize("error", [
+    MlflowException("bad value", error_code=INVALID_PARAMETER_VALUE),
+    _http_error(400),
+    TypeError("not serializable"),
+])
+def test_non_transient_errors_are_raised_not_retried(error):
+    client = FakeClient(errors=[error])
+    ml = BatchLogger("run", client=client, backoff=0.01)
+    ml.log_metric("loss", 0.1)
+    with pytest.raises(type(error)):
+        ml.flush(timeout=10)
+    ml.close()
+    assert client.errors == [] and client.batches == []
+    assert ml.failed_batches == 1
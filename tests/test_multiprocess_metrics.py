@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+API_DIR = str(Path(__file__).resolve().parents[1] / "api")
+
+# a worker: count requests and leave one prediction in flight, as a live uvicorn worker would
+_WORKER = """
+import sys
+sys.path.insert(0, sys.argv[1])
+import metrics
+for _ in range(int(sys.argv[2])):
+    metrics.REQUESTS.labels("POST", "/predict", "200").inc()
+metrics.IN_FLIGHT.labels("3").inc()
+print(__import__("os").getpid())
+"""
+
+_SCRAPE = """
+import sys
+sys.path.insert(0, sys.argv[1])
+import metrics
+for pid in sys.argv[2:]:
+    metrics.multiprocess.mark_process_dead(int(pid))
+sys.stdout.write(metrics.render()[0].decode())
+"""
+
+
+def _run(code, *args, env):
+    return subprocess.run([sys.executable, "-c", code, API_DIR, *map(str, args)], env=env, check=True,
+                          capture_output=True, text=True).stdout
+
+
+def _sample(text, name, **labels):
+    want = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    for line in text.splitlines():
+        if line.startswith(f"{name}{{") and all(part in line for part in want.split(",")):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_counters_and_gauges_aggregate_across_workers(tmp_path):
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    pids = [int(_run(_WORKER, n, env=env)) for n in (3, 5)]
+
+    text = _run(_SCRAPE, env=env)
+    assert _sample(text, "fastapi_requests_total", method="POST", path="/predict", status="200") == 8
+    assert _sample(text, "fastapi_predict_in_flight", model_version="3") == 2
+
+    # a worker that died (serve.py calls mark_process_dead) no longer counts towards live gauges,
+    # while its counters are kept
+    text = _run(_SCRAPE, pids[0], env=env)
+    assert _sample(text, "fastapi_requests_total", method="POST", path="/predict", status="200") == 8
+    assert _sample(text, "fastapi_predict_in_flight", model_version="3") == 1
+
+
+def test_prepare_removes_stale_worker_files(tmp_path, monkeypatch):
+    import serve
+
+    (tmp_path / "counter_123.db").write_bytes(b"stale")
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    assert serve._prepare_multiprocess_metrics() == str(tmp_path)
+    assert not list(tmp_path.glob("*.db"))
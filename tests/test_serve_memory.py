@@ -0,0 +1,89 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+SERVE = Path(__file__).resolve().parents[1] / "api" / "serve.py"
+WORKERS = 3
+
+pytestmark = pytest.mark.skipif(
+    not sys.platform.startswith("linux") or not os.path.exists(f"/proc/{os.getpid()}/smaps_rollup"),
+    reason="needs Linux /proc/<pid>/smaps_rollup")
+
+
+def _rollup_kb(pid):
+    """Rss and Pss of a process in kB, from /proc/<pid>/smaps_rollup."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                values[key] = int(rest.split()[0])
+    return values
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def model_dir(tmp_path_factory):
+    mlflow_sklearn = pytest.importorskip("mlflow.sklearn")
+    pd = pytest.importorskip("pandas")
+    from sklearn.datasets import make_classification
+    from sklearn.ensemble import RandomForestClassifier
+
+    X, y = make_classification(n_samples=5000, n_features=10, n_informative=5, n_classes=3, random_state=0)
+    X = pd.DataFrame(X, columns=[f"f{i}" for i in range(X.shape[1])])
+    rf = RandomForestClassifier(n_estimators=50, random_state=0).fit(X, y)
+    path = tmp_path_factory.mktemp("serve_memory") / "model"
+    mlflow_sklearn.save_model(rf, str(path), input_example=X.iloc[:2],
+                              serialization_format=mlflow_sklearn.SERIALIZATION_FORMAT_CLOUDPICKLE)
+    return str(path)
+
+
+def test_preloaded_workers_share_memory(model_dir, tmp_path):
+    psutil = pytest.importorskip("psutil")
+    pytest.importorskip("uvicorn")
+
+    port = _free_port()
+    env = dict(os.environ, DEFAULT_MODEL_URI=model_dir, ARTIFACT_CACHE_DIR="", LOG_LEVEL="WARNING",
+               PROMETHEUS_MULTIPROC_DIR=str(tmp_path), MLFLOW_DISABLE_AGENT_HINT="1")
+    proc = subprocess.Popen(
+        [sys.executable, str(SERVE), "--workers", str(WORKERS), "--host", "127.0.0.1", "--port", str(port)],
+        cwd=SERVE.parent, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        parent = psutil.Process(proc.pid)
+        deadline = time.monotonic() + 120
+        while True:
+            assert proc.poll() is None, "serve.py exited during startup"
+            assert time.monotonic() < deadline, "serve.py did not become ready"
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=2) as r:
+                    ready = json.loads(r.read()).get("model_loaded")
+                if ready and len(parent.children()) == WORKERS:
+                    break
+            except OSError:
+                pass
+            time.sleep(0.5)
+
+        workers = [_rollup_kb(child.pid) for child in parent.children()]
+        total_pss = _rollup_kb(proc.pid)["Pss"] + sum(w["Pss"] for w in workers)
+        worker_rss = max(w["Rss"] for w in workers)
+        # forked after the load, the workers share the interpreter, libraries and model pages
+        assert total_pss < 0.75 * WORKERS * worker_rss
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(15)
+        except subprocess.TimeoutExpired:
+            proc.kill()
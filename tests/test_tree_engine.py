@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.datasets import load_iris, make_regression
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier, RandomForestRegressor
+
+from tree_engine import CompiledForest, FastTreePredictor, compile_model
+
+
+@pytest.fixture(scope="module")
+def iris():
+    data = load_iris(as_frame=True)
+    return data.data, data.target
+
+
+@pytest.mark.parametrize("cls", [RandomForestClassifier, ExtraTreesClassifier])
+def test_compiled_classifier_matches_sklearn(iris, cls):
+    X, y = iris
+    est = cls(n_estimators=25, random_state=0).fit(X, y)
+    forest = CompiledForest.from_estimator(est)
+    rng = np.random.default_rng(0)
+    rows = X.to_numpy(np.float32) + rng.normal(0, 0.5, size=X.shape).astype(np.float32)
+
+    assert np.array_equal(forest.predict(rows), est.predict(pd.DataFrame(rows, columns=X.columns)))
+    assert np.array_equal(forest.predict_proba(rows), est.predict_proba(pd.DataFrame(rows, columns=X.columns)))
+
+
+def test_compiled_regressor_matches_sklearn():
+    X, y = make_regression(n_samples=300, n_features=5, random_state=0)
+    est = RandomForestRegressor(n_estimators=20, max_depth=8, random_state=0).fit(X, y)
+    forest = CompiledForest.from_estimator(est)
+
+    assert np.array_equal(forest.predict(X.astype(np.float32)), est.predict(X))
+
+
+def test_compile_model_falls_back_for_unusual_input(iris):
+    X, y = iris
+    est = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    fast = compile_model(est)
+    assert isinstance(fast, FastTreePredictor)
+
+    # reordered columns are realigned to the training order
+    assert np.array_equal(fast.predict(X[X.columns[::-1]]), est.predict(X))
+    # NaNs and oversized batches are answered by the original model
+    with_nan = X.head(3).copy()
+    with_nan.iloc[0, 0] = np.nan
+    assert np.array_equal(fast.predict(with_nan), est.predict(with_nan))
+    big = pd.concat([X] * (fast.max_rows // len(X) + 1), ignore_index=True)
+    assert np.array_equal(fast.predict(big), est.predict(big))